@@ -0,0 +1,32 @@
+"""Add created_at indexes on users and votes for dashboard date-range counts
+
+Revision ID: 3a9f5c2e7b14
+Revises: f2c6d9a1e384
+Create Date: 2026-10-18 14:02:41.318807
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9f5c2e7b14'
+down_revision = 'f2c6d9a1e384'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_votes_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('votes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_votes_created_at'))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_created_at'))
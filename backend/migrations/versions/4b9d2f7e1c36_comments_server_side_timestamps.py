@@ -0,0 +1,35 @@
+"""Let the database set comments.created_at and updated_at
+
+Revision ID: 4b9d2f7e1c36
+Revises: 7e2a9c4b1d58
+Create Date: 2026-10-18 18:05:14.273619
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b9d2f7e1c36'
+down_revision = '7e2a9c4b1d58'
+branch_labels = None
+depends_on = None
+
+
+def _set_defaults(default):
+    # SQLite can only change a default by rebuilding comments, which the counter triggers on
+    # likes and votes block; SQLite databases pick the defaults up from create_all instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('created_at', 'updated_at'):
+        op.alter_column('comments', column,
+               existing_type=sa.DateTime(timezone=True),
+               server_default=default)
+
+
+def upgrade():
+    _set_defaults(sa.text('now()'))
+
+
+def downgrade():
+    _set_defaults(None)
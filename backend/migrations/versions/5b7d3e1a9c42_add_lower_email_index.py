@@ -0,0 +1,24 @@
+"""Add functional index on lower(email)
+
+Revision ID: 5b7d3e1a9c42
+Revises: 2f9e808646ab
+Create Date: 2026-10-18 09:12:40.512337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d3e1a9c42'
+down_revision = '2f9e808646ab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
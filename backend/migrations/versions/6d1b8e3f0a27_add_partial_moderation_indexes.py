@@ -0,0 +1,42 @@
+"""Add partial indexes for flagged/pending posts and comments and blocked/admin users
+
+Revision ID: 6d1b8e3f0a27
+Revises: 3a9f5c2e7b14
+Create Date: 2026-10-18 14:31:09.775120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1b8e3f0a27'
+down_revision = '3a9f5c2e7b14'
+branch_labels = None
+depends_on = None
+
+PARTIAL_INDEXES = (
+    ('ix_users_blocked', 'users', ['id'], 'is_blocked = true'),
+    ('ix_users_admins', 'users', ['id'], 'is_admin = true'),
+    ('ix_posts_flagged_created', 'posts', ['created_at'], 'is_flagged = true'),
+    ('ix_posts_pending_created', 'posts', ['created_at'], 'is_approved = false'),
+    ('ix_comments_flagged_created_id', 'comments', ['created_at', 'id'], 'is_flagged = true'),
+    ('ix_comments_pending_created_id', 'comments', ['created_at', 'id'], 'is_approved = false'),
+)
+
+
+def upgrade():
+    # CONCURRENTLY can't run inside a transaction; SQLite ignores the flag
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in PARTIAL_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where), sqlite_where=sa.text(where),
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in reversed(PARTIAL_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
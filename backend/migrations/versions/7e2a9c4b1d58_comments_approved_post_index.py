@@ -0,0 +1,37 @@
+"""Add approved-only comments index for post listings, drop the reply-count index
+
+Revision ID: 7e2a9c4b1d58
+Revises: e8b3f1c6a724
+Create Date: 2026-10-18 17:48:30.916442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2a9c4b1d58'
+down_revision = 'e8b3f1c6a724'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY can't run inside a transaction; SQLite ignores the flag
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_comments_approved_post_created_id', 'comments', ['post_id', 'created_at', 'id'], unique=False,
+            postgresql_where=sa.text('is_approved = true'), sqlite_where=sa.text('is_approved = true'),
+            postgresql_concurrently=True
+        )
+        # Reply counts are read from comments.replies_count now, nothing filters on (parent_id, is_approved)
+        op.drop_index('ix_comments_parent_approved', table_name='comments', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_comments_parent_approved', 'comments', ['parent_id', 'is_approved'], unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_comments_approved_post_created_id', table_name='comments', postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""Add composite index on comments (post_id, created_at, id)
+
+Revision ID: 8e4c2a7f1d03
+Revises: 5b7d3e1a9c42
+Create Date: 2026-10-18 10:03:17.284915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c2a7f1d03'
+down_revision = '5b7d3e1a9c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_post_created_id', ['post_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_post_created_id')
@@ -0,0 +1,66 @@
+"""Add trigger-maintained stats_counters row totals
+
+Revision ID: 9c4e2b7a5d81
+Revises: 6d1b8e3f0a27
+Create Date: 2026-10-18 15:04:52.190366
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2b7a5d81'
+down_revision = '6d1b8e3f0a27'
+branch_labels = None
+depends_on = None
+
+COUNTED_TABLES = ('users', 'posts', 'comments', 'votes', 'likes')
+
+
+def upgrade():
+    op.create_table('stats_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Statement-level triggers touch the counter row once per INSERT/DELETE statement, not once per row
+    op.execute("""
+        CREATE FUNCTION bump_stats_counter() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE stats_counters SET value = value + (SELECT count(*) FROM changed_rows) WHERE name = TG_TABLE_NAME;
+            ELSE
+                UPDATE stats_counters SET value = value - (SELECT count(*) FROM changed_rows) WHERE name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_stats_counter()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_stats_counter()
+        """)
+        # CREATE TRIGGER holds off concurrent writes until commit, so this seed can't miss rows
+        op.execute(f"INSERT INTO stats_counters (name, value) SELECT '{table}', count(*) FROM {table}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in COUNTED_TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_count_delete ON {table}")
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_count_insert ON {table}")
+        op.execute("DROP FUNCTION IF EXISTS bump_stats_counter()")
+
+    op.drop_table('stats_counters')
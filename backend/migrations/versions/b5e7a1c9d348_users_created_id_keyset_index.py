@@ -0,0 +1,28 @@
+"""Replace users created_at index with (created_at, id) for keyset pagination
+
+Revision ID: b5e7a1c9d348
+Revises: 9c4e2b7a5d81
+Create Date: 2026-10-18 15:40:26.553012
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e7a1c9d348'
+down_revision = '9c4e2b7a5d81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_id', ['created_at', 'id'], unique=False)
+        batch_op.drop_index(batch_op.f('ix_users_created_at'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_created_at'), ['created_at'], unique=False)
+        batch_op.drop_index('ix_users_created_id')
@@ -0,0 +1,28 @@
+"""Add composite indexes on comments (user_id, created_at, id) and (parent_id, created_at)
+
+Revision ID: c31f6a8d2b57
+Revises: 8e4c2a7f1d03
+Create Date: 2026-10-18 11:26:42.518307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c31f6a8d2b57'
+down_revision = '8e4c2a7f1d03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_user_created_id', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_comments_parent_created', ['parent_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_parent_created')
+        batch_op.drop_index('ix_comments_user_created_id')
@@ -0,0 +1,39 @@
+"""Add pg_trgm GIN indexes on users username/email for substring search
+
+Revision ID: d3f8a6b2c915
+Revises: b5e7a1c9d348
+Create Date: 2026-10-18 16:12:08.431975
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8a6b2c915'
+down_revision = 'b5e7a1c9d348'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in ('username', 'email'):
+            op.create_index(
+                f'ix_users_{column}_trgm', 'users', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for column in ('email', 'username'):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True)
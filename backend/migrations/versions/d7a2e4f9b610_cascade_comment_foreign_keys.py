@@ -0,0 +1,40 @@
+"""Cascade deletes on foreign keys pointing at comments and on comments.post_id
+
+Revision ID: d7a2e4f9b610
+Revises: c31f6a8d2b57
+Create Date: 2026-10-18 12:08:51.730244
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2e4f9b610'
+down_revision = 'c31f6a8d2b57'
+branch_labels = None
+depends_on = None
+
+
+CASCADED = [
+    ('comments', 'post_id', 'posts'),
+    ('comments', 'parent_id', 'comments'),
+    ('likes', 'comment_id', 'comments'),
+    ('votes', 'comment_id', 'comments'),
+]
+
+
+def upgrade():
+    for table, column, referent in CASCADED:
+        name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for table, column, referent in reversed(CASCADED):
+        name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referent, [column], ['id'])
@@ -0,0 +1,34 @@
+"""Store comment created_at/updated_at as timezone-aware UTC timestamps
+
+Revision ID: e5b8c1d4a927
+Revises: d7a2e4f9b610
+Create Date: 2026-10-18 12:41:05.392817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c1d4a927'
+down_revision = 'd7a2e4f9b610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        for column in ('created_at', 'updated_at'):
+            batch_op.alter_column(column,
+                   existing_type=sa.DateTime(),
+                   type_=sa.DateTime(timezone=True),
+                   postgresql_using=f"{column} AT TIME ZONE 'UTC'")
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        for column in ('created_at', 'updated_at'):
+            batch_op.alter_column(column,
+                   existing_type=sa.DateTime(timezone=True),
+                   type_=sa.DateTime(),
+                   postgresql_using=f"{column} AT TIME ZONE 'UTC'")
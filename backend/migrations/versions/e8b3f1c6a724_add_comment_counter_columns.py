@@ -0,0 +1,211 @@
+"""Add trigger-maintained like, vote and reply counters to comments
+
+Revision ID: e8b3f1c6a724
+Revises: d3f8a6b2c915
+Create Date: 2026-10-18 17:21:46.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f1c6a724'
+down_revision = 'd3f8a6b2c915'
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = ('likes_count', 'upvotes', 'downvotes', 'vote_score', 'replies_count')
+
+COUNTER_DDL = {
+    'comments': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_replies_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    IF OLD.is_approved THEN
+                        UPDATE comments SET replies_count = replies_count - 1 WHERE id = OLD.parent_id;
+                    END IF;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    IF NEW.is_approved THEN
+                        UPDATE comments SET replies_count = replies_count + 1 WHERE id = NEW.parent_id;
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter AFTER INSERT OR DELETE OR UPDATE OF is_approved, parent_id ON comments
+            FOR EACH ROW EXECUTE FUNCTION comment_replies_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER comments_replies_counter_insert AFTER INSERT ON comments
+            WHEN NEW.is_approved AND NEW.parent_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET replies_count = replies_count + 1 WHERE id = NEW.parent_id;
+            END
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter_delete AFTER DELETE ON comments
+            WHEN OLD.is_approved AND OLD.parent_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET replies_count = replies_count - 1 WHERE id = OLD.parent_id;
+            END
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter_update AFTER UPDATE OF is_approved, parent_id ON comments
+            BEGIN
+                UPDATE comments SET replies_count = replies_count - OLD.is_approved WHERE id = OLD.parent_id;
+                UPDATE comments SET replies_count = replies_count + NEW.is_approved WHERE id = NEW.parent_id;
+            END
+            """,
+        ],
+    },
+    'votes': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_votes_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    UPDATE comments SET upvotes = upvotes - (OLD.value = 1)::int,
+                                        downvotes = downvotes - (OLD.value = -1)::int,
+                                        vote_score = vote_score - OLD.value
+                    WHERE id = OLD.comment_id;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    UPDATE comments SET upvotes = upvotes + (NEW.value = 1)::int,
+                                        downvotes = downvotes + (NEW.value = -1)::int,
+                                        vote_score = vote_score + NEW.value
+                    WHERE id = NEW.comment_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter AFTER INSERT OR DELETE OR UPDATE OF value ON votes
+            FOR EACH ROW EXECUTE FUNCTION comment_votes_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER votes_comment_counter_insert AFTER INSERT ON votes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes + (NEW.value = 1),
+                                    downvotes = downvotes + (NEW.value = -1),
+                                    vote_score = vote_score + NEW.value
+                WHERE id = NEW.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter_delete AFTER DELETE ON votes
+            WHEN OLD.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes - (OLD.value = 1),
+                                    downvotes = downvotes - (OLD.value = -1),
+                                    vote_score = vote_score - OLD.value
+                WHERE id = OLD.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter_update AFTER UPDATE OF value ON votes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes + (NEW.value = 1) - (OLD.value = 1),
+                                    downvotes = downvotes + (NEW.value = -1) - (OLD.value = -1),
+                                    vote_score = vote_score + NEW.value - OLD.value
+                WHERE id = NEW.comment_id;
+            END
+            """,
+        ],
+    },
+    'likes': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_likes_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    UPDATE comments SET likes_count = likes_count + 1 WHERE id = NEW.comment_id;
+                ELSE
+                    UPDATE comments SET likes_count = likes_count - 1 WHERE id = OLD.comment_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER likes_comment_counter AFTER INSERT OR DELETE ON likes
+            FOR EACH ROW EXECUTE FUNCTION comment_likes_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER likes_comment_counter_insert AFTER INSERT ON likes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET likes_count = likes_count + 1 WHERE id = NEW.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER likes_comment_counter_delete AFTER DELETE ON likes
+            WHEN OLD.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET likes_count = likes_count - 1 WHERE id = OLD.comment_id;
+            END
+            """,
+        ],
+    },
+}
+
+DROP_COUNTER_DDL = {
+    'postgresql': [
+        "DROP TRIGGER IF EXISTS comments_replies_counter ON comments",
+        "DROP TRIGGER IF EXISTS votes_comment_counter ON votes",
+        "DROP TRIGGER IF EXISTS likes_comment_counter ON likes",
+        "DROP FUNCTION IF EXISTS comment_replies_counter()",
+        "DROP FUNCTION IF EXISTS comment_votes_counter()",
+        "DROP FUNCTION IF EXISTS comment_likes_counter()",
+    ],
+    'sqlite': [
+        f"DROP TRIGGER IF EXISTS {table}_counter_{event}"
+        for table, events in (
+            ('comments_replies', ('insert', 'delete', 'update')),
+            ('votes_comment', ('insert', 'delete', 'update')),
+            ('likes_comment', ('insert', 'delete')),
+        )
+        for event in events
+    ],
+}
+
+def upgrade():
+    for column in COUNTER_COLUMNS:
+        op.add_column('comments', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    dialect = op.get_bind().dialect.name
+    for statements in COUNTER_DDL.values():
+        for statement in statements.get(dialect, ()):
+            op.execute(statement)
+
+    # The triggers are in place first, so the backfill can't miss writes made while it runs
+    op.execute("""
+        UPDATE comments SET
+            likes_count = (SELECT count(*) FROM likes WHERE likes.comment_id = comments.id),
+            upvotes = (SELECT count(*) FROM votes WHERE votes.comment_id = comments.id AND votes.value = 1),
+            downvotes = (SELECT count(*) FROM votes WHERE votes.comment_id = comments.id AND votes.value = -1),
+            vote_score = (SELECT coalesce(sum(votes.value), 0) FROM votes WHERE votes.comment_id = comments.id),
+            replies_count = (SELECT count(*) FROM comments AS reply WHERE reply.parent_id = comments.id AND reply.is_approved)
+    """)
+
+
+def downgrade():
+    for statement in DROP_COUNTER_DDL.get(op.get_bind().dialect.name, ()):
+        op.execute(statement)
+
+    for column in reversed(COUNTER_COLUMNS):
+        op.drop_column('comments', column)
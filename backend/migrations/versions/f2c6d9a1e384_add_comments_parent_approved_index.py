@@ -0,0 +1,26 @@
+"""Add covering index on comments (parent_id, is_approved) for approved reply counts
+
+Revision ID: f2c6d9a1e384
+Revises: e5b8c1d4a927
+Create Date: 2026-10-18 13:15:27.604193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6d9a1e384'
+down_revision = 'e5b8c1d4a927'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_parent_approved', ['parent_id', 'is_approved'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_parent_approved')
@@ -1,8 +1,30 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event, DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from datetime import datetime, timezone
 
 db = SQLAlchemy()
 
+
+class utcnow(FunctionElement):
+    """Current UTC time evaluated by the database, for server-side column defaults"""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, 'postgresql')
+def _utcnow_postgresql(element, compiler, **kw):
+    return "now()"
+
+# Same text format SQLAlchemy writes for DateTime on SQLite, so (created_at, id) cursors still compare equal
+@compiles(utcnow, 'sqlite')
+def _utcnow_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -23,6 +45,15 @@ class User(db.Model):
     votes = db.relationship('Vote', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     likes = db.relationship('Like', backref='user', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_users_email_lower', db.func.lower(email), unique=True),
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+        db.Index('ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_users_blocked', 'id', postgresql_where=is_blocked == True, sqlite_where=is_blocked == True),
+        db.Index('ix_users_admins', 'id', postgresql_where=is_admin == True, sqlite_where=is_admin == True),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -39,6 +70,9 @@ class User(db.Model):
     def __repr__(self):
         return f"<User {self.username} (admin={self.is_admin})>"
 
+# The trigram indexes above need pg_trgm before create_all builds the users table
+event.listen(User.__table__, 'before_create', DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
+
 class Post(db.Model):
     __tablename__ = 'posts'
 
@@ -57,10 +91,14 @@ class Post(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
    
-    comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade="all, delete-orphan")
+    comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade="all, delete-orphan", passive_deletes=True)
     votes = db.relationship('Vote', backref='post', lazy='dynamic', cascade="all, delete-orphan")
     likes = db.relationship('Like', backref='post', lazy='dynamic', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_posts_flagged_created', 'created_at', postgresql_where=is_flagged == True, sqlite_where=is_flagged == True),
+        db.Index('ix_posts_pending_created', 'created_at', postgresql_where=is_approved == False, sqlite_where=is_approved == False),
+    )
 
     @property
     def likes_count(self):
@@ -92,24 +130,34 @@ class Post(db.Model):
        
         return self.comments.filter_by(is_approved=True).count()
 
-    def to_dict(self, include_author=True, current_user=None):
+    def to_dict(self, include_author=True, current_user=None, counts=None):
        
+        if counts is None:
+            counts = {
+                'likes_count': self.likes_count,
+                'vote_score': self.vote_score,
+                'upvotes_count': self.upvotes_count,
+                'downvotes_count': self.downvotes_count,
+                'total_votes': self.total_votes,
+                'comments_count': self.comments_count
+            }
+
         data = {
             'id': self.id,
             'title': self.title,
             'content': self.content,
             'tags': self.tags,
             'user_id': self.user_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'is_approved': self.is_approved,
             'is_flagged': self.is_flagged,
-            'likes_count': self.likes_count,
-            'vote_score': self.vote_score,
-            'upvotes_count': self.upvotes_count,
-            'downvotes_count': self.downvotes_count,
-            'total_votes': self.total_votes,
-            'comments_count': self.comments_count
+            'likes_count': counts['likes_count'],
+            'vote_score': counts['vote_score'],
+            'upvotes_count': counts['upvotes_count'],
+            'downvotes_count': counts['downvotes_count'],
+            'total_votes': counts['total_votes'],
+            'comments_count': counts['comments_count']
         }
         
         if include_author and self.user:
@@ -122,13 +170,17 @@ class Post(db.Model):
 
        
         if current_user:
-            user_vote = self.votes.filter_by(user_id=current_user.id).first()
-            data['user_vote'] = user_vote.value if user_vote else None
-            data['userVote'] = user_vote.value if user_vote else None  
-            
-            user_like = self.likes.filter_by(user_id=current_user.id).first()
-            data['user_liked'] = user_like is not None
-            data['liked_by_user'] = user_like is not None 
+            if 'user_vote' in counts:
+                user_vote = counts['user_vote']
+                user_liked = bool(counts['user_liked'])
+            else:
+                vote = self.votes.filter_by(user_id=current_user.id).first()
+                user_vote = vote.value if vote else None
+                user_liked = self.likes.filter_by(user_id=current_user.id).first() is not None
+            data['user_vote'] = user_vote
+            data['userVote'] = user_vote
+            data['user_liked'] = user_liked
+            data['liked_by_user'] = user_liked
         
         return data
 
@@ -140,74 +192,87 @@ class Comment(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=utcnow(), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=utcnow(), onupdate=utcnow())
 
  
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False, index=True)
-    parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True, index=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False, index=True)
+    parent_id = db.Column(db.Integer, db.ForeignKey('comments.id', ondelete='CASCADE'), nullable=True, index=True)
 
   
     is_flagged = db.Column(db.Boolean, default=False, nullable=False, index=True)
     is_approved = db.Column(db.Boolean, default=False, nullable=False, index=True) 
 
+    # Maintained by the comment counter triggers below; never assign these from Python
+    likes_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    upvotes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    downvotes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    vote_score = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    replies_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
   
-    votes = db.relationship('Vote', backref='comment', lazy='dynamic', cascade='all, delete-orphan')
-    likes = db.relationship('Like', backref='comment', lazy='dynamic', cascade='all, delete-orphan')
+    # passive_deletes leaves votes, likes and nested replies to the ON DELETE CASCADE foreign keys
+    votes = db.relationship('Vote', backref='comment', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    likes = db.relationship('Like', backref='comment', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
 
-    replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
-
- 
-    @property
-    def likes_count(self):
-        
-        return self.likes.count()
+    replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]), lazy='dynamic',
+                              cascade='all, delete-orphan', passive_deletes=True)
 
-    @property
-    def vote_score(self):
-       
-        return sum(vote.value for vote in self.votes)
+    __table_args__ = (
+        db.Index('ix_comments_post_created_id', 'post_id', 'created_at', 'id'),
+        db.Index('ix_comments_user_created_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_comments_parent_created', 'parent_id', 'created_at'),
+        db.Index('ix_comments_flagged_created_id', 'created_at', 'id', postgresql_where=is_flagged == True, sqlite_where=is_flagged == True),
+        db.Index('ix_comments_pending_created_id', 'created_at', 'id', postgresql_where=is_approved == False, sqlite_where=is_approved == False),
+        db.Index('ix_comments_approved_post_created_id', 'post_id', 'created_at', 'id', postgresql_where=is_approved == True, sqlite_where=is_approved == True),
+    )
 
+ 
     @property
     def upvotes_count(self):
       
-        return self.votes.filter_by(value=1).count()
+        return self.upvotes
 
     @property
     def downvotes_count(self):
 
-        return self.votes.filter_by(value=-1).count()
+        return self.downvotes
 
     @property
     def total_votes(self):
        
-        return self.votes.count()
-
-    @property
-    def replies_count(self):
-        
-        return self.replies.filter_by(is_approved=True).count()
+        return self.upvotes + self.downvotes
 
-    def to_dict(self, include_author=True, current_user=None):
+    def to_dict(self, include_author=True, current_user=None, counts=None):
        
+        if counts is None:
+            counts = {
+                'likes_count': self.likes_count,
+                'vote_score': self.vote_score,
+                'upvotes_count': self.upvotes_count,
+                'downvotes_count': self.downvotes_count,
+                'total_votes': self.total_votes,
+                'replies_count': self.replies_count
+            }
+
         data = {
             'id': self.id,
             'content': self.content,
             'post_id': self.post_id,
             'user_id': self.user_id,
             'parent_id': self.parent_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'is_approved': self.is_approved,
             'is_flagged': self.is_flagged,
-            'likes_count': self.likes_count,
-            'vote_score': self.vote_score,
-            'upvotes_count': self.upvotes_count,
-            'downvotes_count': self.downvotes_count,
-            'total_votes': self.total_votes,
-            'replies_count': self.replies_count
+            'likes_count': counts['likes_count'],
+            'vote_score': counts['vote_score'],
+            'upvotes_count': counts['upvotes_count'],
+            'downvotes_count': counts['downvotes_count'],
+            'total_votes': counts['total_votes'],
+            'replies_count': counts['replies_count']
         }
         
         if include_author and self.user:
@@ -220,13 +285,17 @@ class Comment(db.Model):
 
     
         if current_user:
-            user_vote = self.votes.filter_by(user_id=current_user.id).first()
-            data['user_vote'] = user_vote.value if user_vote else None
-            data['userVote'] = user_vote.value if user_vote else None 
-            
-            user_like = self.likes.filter_by(user_id=current_user.id).first()
-            data['user_liked'] = user_like is not None
-            data['liked_by_user'] = user_like is not None
+            if 'user_vote' in counts:
+                user_vote = counts['user_vote']
+                user_liked = bool(counts['user_liked'])
+            else:
+                vote = self.votes.filter_by(user_id=current_user.id).first()
+                user_vote = vote.value if vote else None
+                user_liked = self.likes.filter_by(user_id=current_user.id).first() is not None
+            data['user_vote'] = user_vote
+            data['userVote'] = user_vote
+            data['user_liked'] = user_liked
+            data['liked_by_user'] = user_liked
         
         return data
 
@@ -238,12 +307,12 @@ class Vote(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     value = db.Column(db.Integer, nullable=False) 
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
 
  
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=True, index=True)
-    comment_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True, index=True)
+    comment_id = db.Column(db.Integer, db.ForeignKey('comments.id', ondelete='CASCADE'), nullable=True, index=True)
 
 
     __table_args__ = (
@@ -283,7 +352,7 @@ class Like(db.Model):
   
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=True, index=True)
-    comment_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True, index=True)
+    comment_id = db.Column(db.Integer, db.ForeignKey('comments.id', ondelete='CASCADE'), nullable=True, index=True)
 
  
     __table_args__ = (
@@ -319,4 +388,205 @@ class TokenBlocklist(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
 
     def __repr__(self):
-        return f"<TokenBlocklist {self.jti}>"
\ No newline at end of file
+        return f"<TokenBlocklist {self.jti}>"
+
+
+class StatsCounter(db.Model):
+    __tablename__ = 'stats_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatsCounter {self.name}={self.value}>"
+
+
+# Statement-level triggers touch the counter row once per INSERT/DELETE statement, not once per row.
+# stats_counters is created after the tables it counts, so its after_create hook can install their
+# triggers and seed the totals for db.create_all() the way migration 9c4e2b7a5d81 does
+_STATS_COUNTER_DDL = [
+    """
+    CREATE FUNCTION bump_stats_counter() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE stats_counters SET value = value + (SELECT count(*) FROM changed_rows) WHERE name = TG_TABLE_NAME;
+        ELSE
+            UPDATE stats_counters SET value = value - (SELECT count(*) FROM changed_rows) WHERE name = TG_TABLE_NAME;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+for _table in (User.__table__, Post.__table__, Comment.__table__, Vote.__table__, Like.__table__):
+    StatsCounter.__table__.add_is_dependent_on(_table)
+    _STATS_COUNTER_DDL += [
+        f"""
+        CREATE TRIGGER {_table.name}_count_insert AFTER INSERT ON {_table.name}
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_stats_counter()
+        """,
+        f"""
+        CREATE TRIGGER {_table.name}_count_delete AFTER DELETE ON {_table.name}
+        REFERENCING OLD TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_stats_counter()
+        """,
+        f"INSERT INTO stats_counters (name, value) SELECT '{_table.name}', count(*) FROM {_table.name}",
+    ]
+
+for _statement in _STATS_COUNTER_DDL:
+    event.listen(StatsCounter.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+
+# Row-level triggers keep the Comment counter columns in step with every write path,
+# including FK cascades and the write-behind like flush
+_COMMENT_COUNTER_DDL = {
+    'comments': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_replies_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    IF OLD.is_approved THEN
+                        UPDATE comments SET replies_count = replies_count - 1 WHERE id = OLD.parent_id;
+                    END IF;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    IF NEW.is_approved THEN
+                        UPDATE comments SET replies_count = replies_count + 1 WHERE id = NEW.parent_id;
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter AFTER INSERT OR DELETE OR UPDATE OF is_approved, parent_id ON comments
+            FOR EACH ROW EXECUTE FUNCTION comment_replies_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER comments_replies_counter_insert AFTER INSERT ON comments
+            WHEN NEW.is_approved AND NEW.parent_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET replies_count = replies_count + 1 WHERE id = NEW.parent_id;
+            END
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter_delete AFTER DELETE ON comments
+            WHEN OLD.is_approved AND OLD.parent_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET replies_count = replies_count - 1 WHERE id = OLD.parent_id;
+            END
+            """,
+            """
+            CREATE TRIGGER comments_replies_counter_update AFTER UPDATE OF is_approved, parent_id ON comments
+            BEGIN
+                UPDATE comments SET replies_count = replies_count - OLD.is_approved WHERE id = OLD.parent_id;
+                UPDATE comments SET replies_count = replies_count + NEW.is_approved WHERE id = NEW.parent_id;
+            END
+            """,
+        ],
+    },
+    'votes': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_votes_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    UPDATE comments SET upvotes = upvotes - (OLD.value = 1)::int,
+                                        downvotes = downvotes - (OLD.value = -1)::int,
+                                        vote_score = vote_score - OLD.value
+                    WHERE id = OLD.comment_id;
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    UPDATE comments SET upvotes = upvotes + (NEW.value = 1)::int,
+                                        downvotes = downvotes + (NEW.value = -1)::int,
+                                        vote_score = vote_score + NEW.value
+                    WHERE id = NEW.comment_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter AFTER INSERT OR DELETE OR UPDATE OF value ON votes
+            FOR EACH ROW EXECUTE FUNCTION comment_votes_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER votes_comment_counter_insert AFTER INSERT ON votes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes + (NEW.value = 1),
+                                    downvotes = downvotes + (NEW.value = -1),
+                                    vote_score = vote_score + NEW.value
+                WHERE id = NEW.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter_delete AFTER DELETE ON votes
+            WHEN OLD.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes - (OLD.value = 1),
+                                    downvotes = downvotes - (OLD.value = -1),
+                                    vote_score = vote_score - OLD.value
+                WHERE id = OLD.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER votes_comment_counter_update AFTER UPDATE OF value ON votes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET upvotes = upvotes + (NEW.value = 1) - (OLD.value = 1),
+                                    downvotes = downvotes + (NEW.value = -1) - (OLD.value = -1),
+                                    vote_score = vote_score + NEW.value - OLD.value
+                WHERE id = NEW.comment_id;
+            END
+            """,
+        ],
+    },
+    'likes': {
+        'postgresql': [
+            """
+            CREATE FUNCTION comment_likes_counter() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    UPDATE comments SET likes_count = likes_count + 1 WHERE id = NEW.comment_id;
+                ELSE
+                    UPDATE comments SET likes_count = likes_count - 1 WHERE id = OLD.comment_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE TRIGGER likes_comment_counter AFTER INSERT OR DELETE ON likes
+            FOR EACH ROW EXECUTE FUNCTION comment_likes_counter()
+            """,
+        ],
+        'sqlite': [
+            """
+            CREATE TRIGGER likes_comment_counter_insert AFTER INSERT ON likes
+            WHEN NEW.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET likes_count = likes_count + 1 WHERE id = NEW.comment_id;
+            END
+            """,
+            """
+            CREATE TRIGGER likes_comment_counter_delete AFTER DELETE ON likes
+            WHEN OLD.comment_id IS NOT NULL
+            BEGIN
+                UPDATE comments SET likes_count = likes_count - 1 WHERE id = OLD.comment_id;
+            END
+            """,
+        ],
+    },
+}
+
+for _table in (Comment.__table__, Vote.__table__, Like.__table__):
+    for _dialect, _statements in _COMMENT_COUNTER_DDL[_table.name].items():
+        for _statement in _statements:
+            event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
@@ -1,6 +1,6 @@
 from app import app
 from models import db, User, Post
-from werkzeug.security import generate_password_hash
+from views.utils import hash_password
 from datetime import datetime
 
 with app.app_context():
@@ -11,7 +11,7 @@ with app.app_context():
     admin = User(
         username="Admin",
         email="administrator@example.com",
-        password_hash=generate_password_hash("admin123"),
+        password_hash=hash_password("admin123"),
         is_admin=True,
     )
     db.session.add(admin)
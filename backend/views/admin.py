@@ -2,14 +2,55 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from functools import wraps
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, update, text, select, case, true, LABEL_STYLE_TABLENAME_PLUS_COL
+from sqlalchemy.orm import contains_eager, joinedload
 from models import db, User, Post, Comment, Vote, Like
+from .utils import (
+    encoded_cache, conditional_json, compressed_json, invalidate_dashboard, get_user_state, get_current_user, invalidate_user_state, invalidate_comment_lists, forget_comment_liker, comments_with_counts, posts_with_counts, stats_counters, estimated_row_count,
+    encode_cursor, decode_cursor, apply_cursor, page_with_probe, KEYSET_DEFAULT_LIMIT, KEYSET_MAX_LIMIT
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint("admin", __name__)
 
+DASHBOARD_CACHE_TTL = 30
+# Shorter substrings have no trigrams, so the GIN indexes can't serve them
+USER_SEARCH_MIN_LENGTH = 3
+
+def _wants_fresh():
+    return request.args.get('fresh', '').lower() in ('1', 'true')
+
+def _set_status(model, row_id, column, data, *returning):
+    """Set or toggle a moderation flag in one UPDATE ... RETURNING the new value and any extra columns; None when the row doesn't exist"""
+    if db.engine.dialect.name == 'postgresql':
+        # Losing the last moments of moderation toggles on a crash is acceptable; don't wait on the WAL flush
+        db.session.execute(text("SET LOCAL synchronous_commit TO OFF"))
+    value = bool(data[column.key]) if column.key in data else ~column
+    return db.session.execute(
+        update(model)
+        .where(model.id == row_id)
+        .values({column: value})
+        .returning(column, *returning)
+    ).first()
+
+# User.to_dict() fields minus password_hash, so listings skip ORM hydration
+_USER_LIST_COLUMNS = (
+    User.id, User.username, User.email, User.is_admin, User.is_blocked,
+    User.is_active, User.avatar_url, User.created_at, User.updated_at
+)
+
+def _count_for_user(model, *criteria):
+    """Correlated COUNT of a user's rows in model, selected alongside User to avoid per-user queries"""
+    return (
+        select(func.count())
+        .select_from(model)
+        .where(model.user_id == User.id, *criteria)
+        .correlate(User)
+        .scalar_subquery()
+    )
+
 def admin_required(fn):
    
     @wraps(fn)  
@@ -20,14 +61,14 @@ def admin_required(fn):
             if not user_id:
                 return jsonify({"error": "Authentication required"}), 401
             
-            user = User.query.get(user_id)
+            user = get_user_state(user_id)
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
-            if not user.is_admin:
+            if not user['is_admin']:
                 return jsonify({"error": "Admin access required"}), 403
             
-            if user.is_blocked:
+            if user['is_blocked']:
                 return jsonify({"error": "Account is blocked"}), 403
             
             return fn(*args, **kwargs)
@@ -43,55 +84,60 @@ def admin_required(fn):
 def admin_stats():
     
     try:
+        if not _wants_fresh():
+            cached = encoded_cache("admin:stats")
+            if cached is not None:
+                return conditional_json(cached)
        
-        total_users = User.query.count()
-        total_posts = Post.query.count()
-        total_comments = Comment.query.count()
-        total_votes = Vote.query.count()
-        total_likes = Like.query.count()
-        
-       
-        blocked_users = User.query.filter_by(is_blocked=True).count()
-        admin_users = User.query.filter_by(is_admin=True).count()
-        active_users = User.query.filter_by(is_active=True).count()
-        
-        
-        flagged_posts = 0
-        flagged_comments = 0
-        pending_posts = 0
-        pending_comments = 0
-        approved_posts = 0
-        approved_comments = 0
-        
-        try:
-            if hasattr(Post, 'is_flagged'):
-                flagged_posts = Post.query.filter_by(is_flagged=True).count()
-            if hasattr(Comment, 'is_flagged'):
-                flagged_comments = Comment.query.filter_by(is_flagged=True).count()
-            if hasattr(Post, 'is_approved'):
-                pending_posts = Post.query.filter_by(is_approved=False).count()
-                approved_posts = Post.query.filter_by(is_approved=True).count()
-            else:
-                approved_posts = total_posts
-            if hasattr(Comment, 'is_approved'):
-                pending_comments = Comment.query.filter_by(is_approved=False).count()
-                approved_comments = Comment.query.filter_by(is_approved=True).count()
-            else:
-                approved_comments = total_comments
-        except Exception as e:
-            current_app.logger.warning(f"Error fetching flagged/pending counts: {e}")
-        
-        
-        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        recent_users = User.query.filter(User.created_at >= week_ago).count()
-        recent_posts = Post.query.filter(Post.created_at >= week_ago).count()
-        recent_comments = Comment.query.filter(Comment.created_at >= week_ago).count()
-        
-        
-        today = datetime.now(timezone.utc).date()
-        today_users = User.query.filter(func.date(User.created_at) == today).count()
-        today_posts = Post.query.filter(func.date(Post.created_at) == today).count()
-        today_comments = Comment.query.filter(func.date(Comment.created_at) == today).count()
+        now = datetime.now(timezone.utc)
+        week_ago = now - timedelta(days=7)
+        today_start = datetime.combine(now.date(), datetime.min.time(), tzinfo=timezone.utc)
+        today_end = today_start + timedelta(days=1)
+
+        def _counted(condition):
+            return func.count(case((condition, 1)))
+
+        users = select(
+            func.count().label('total'),
+            _counted(User.is_blocked).label('blocked'),
+            _counted(User.is_admin).label('admin'),
+            _counted(User.is_active).label('active'),
+            _counted(User.created_at >= week_ago).label('recent'),
+            _counted(and_(User.created_at >= today_start, User.created_at < today_end)).label('today'),
+        ).select_from(User).subquery('users')
+
+        posts, comments = (
+            select(
+                func.count().label('total'),
+                _counted(model.is_flagged).label('flagged'),
+                _counted(model.is_approved).label('approved'),
+                _counted(model.created_at >= week_ago).label('recent'),
+                _counted(and_(model.created_at >= today_start, model.created_at < today_end)).label('today'),
+            ).select_from(model).subquery(model.__tablename__)
+            for model in (Post, Comment)
+        )
+
+        # The three single-row aggregates come back side by side in one round-trip; the columns are
+        # read by their table-qualified labels because every subquery names its count 'total'
+        row = db.session.execute(
+            select(users, posts, comments)
+            .select_from(users.join(posts, true()).join(comments, true()))
+            .set_label_style(LABEL_STYLE_TABLENAME_PLUS_COL)
+        ).one()._mapping
+
+        # Vote/like tiles stand alone, so a planner estimate is fine when the counters aren't installed
+        totals = stats_counters()
+        total_votes = totals['votes'] if 'votes' in totals else estimated_row_count(Vote)
+        total_likes = totals['likes'] if 'likes' in totals else estimated_row_count(Like)
+
+        total_users, total_posts, total_comments = row['users_total'], row['posts_total'], row['comments_total']
+        blocked_users, admin_users, active_users = row['users_blocked'], row['users_admin'], row['users_active']
+        flagged_posts, approved_posts = row['posts_flagged'], row['posts_approved']
+        flagged_comments, approved_comments = row['comments_flagged'], row['comments_approved']
+        pending_posts = total_posts - approved_posts
+        pending_comments = total_comments - approved_comments
+        recent_users, recent_posts, recent_comments = row['users_recent'], row['posts_recent'], row['comments_recent']
+        today_users, today_posts, today_comments = row['users_today'], row['posts_today'], row['comments_today']
         
         stats = {
            
@@ -136,8 +182,9 @@ def admin_stats():
             "comment_approval_rate": round((approved_comments / total_comments * 100) if total_comments > 0 else 0, 1)
         }
         
+        body = encoded_cache("admin:stats", current_app.json.dumps(stats), ttl=DASHBOARD_CACHE_TTL)
         current_app.logger.info(f"Admin stats retrieved successfully")
-        return jsonify(stats), 200
+        return conditional_json(body)
         
     except Exception as e:
         current_app.logger.error(f"Error fetching admin stats: {e}")
@@ -148,31 +195,35 @@ def admin_stats():
 def get_activity_trends():
   
     try:
+        if not _wants_fresh():
+            cached = encoded_cache("admin:activity-trends")
+            if cached is not None:
+                return conditional_json(cached)
         
         end_date = datetime.now(timezone.utc).date()
         start_date = end_date - timedelta(days=6)
         
         
-        date_labels = []
-        daily_posts = []
-        daily_users = []
-        daily_comments = []
-        daily_votes = []
-        
-        for i in range(7):
-            current_date = start_date + timedelta(days=i)
-            date_labels.append(current_date.strftime('%a'))  
-            
-           
-            posts_count = Post.query.filter(func.date(Post.created_at) == current_date).count()
-            users_count = User.query.filter(func.date(User.created_at) == current_date).count()
-            comments_count = Comment.query.filter(func.date(Comment.created_at) == current_date).count()
-            votes_count = Vote.query.filter(func.date(Vote.created_at) == current_date).count()
-            
-            daily_posts.append(posts_count)
-            daily_users.append(users_count)
-            daily_comments.append(comments_count)
-            daily_votes.append(votes_count)
+        start_dt = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
+        end_dt = start_dt + timedelta(days=7)
+        days = [start_date + timedelta(days=i) for i in range(7)]
+        date_labels = [day.strftime('%a') for day in days]
+
+        def _daily(model):
+            bucket = func.date(model.created_at)
+            rows = db.session.execute(
+                select(bucket, func.count())
+                .where(model.created_at >= start_dt, model.created_at < end_dt)
+                .group_by(bucket)
+            ).all()
+            # SQLite returns date() as text, PostgreSQL as a date; key both by ISO string
+            counts = {str(d): c for d, c in rows}
+            return [counts.get(day.isoformat(), 0) for day in days]
+
+        daily_posts = _daily(Post)
+        daily_users = _daily(User)
+        daily_comments = _daily(Comment)
+        daily_votes = _daily(Vote)
         
         trends_data = {
             "labels": date_labels,
@@ -182,8 +233,9 @@ def get_activity_trends():
             "votes": daily_votes
         }
         
+        body = encoded_cache("admin:activity-trends", current_app.json.dumps(trends_data), ttl=DASHBOARD_CACHE_TTL)
         current_app.logger.info(f"Activity trends retrieved successfully")
-        return jsonify(trends_data), 200
+        return conditional_json(body)
         
     except Exception as e:
         current_app.logger.error(f"Activity trends error: {e}")
@@ -204,25 +256,24 @@ def search_users():
         query = request.args.get('q', '').strip()
         if not query:
             return jsonify({"error": "Search query is required"}), 400
+        if len(query) < USER_SEARCH_MIN_LENGTH:
+            return jsonify({"error": f"Search query must be at least {USER_SEARCH_MIN_LENGTH} characters"}), 400
         
         limit = min(request.args.get('limit', 20, type=int), 50)
         
        
-        users = User.query.filter(
+        rows = db.session.query(
+            *_USER_LIST_COLUMNS,
+            _count_for_user(Post).label('posts_count'),
+            _count_for_user(Comment).label('comments_count')
+        ).filter(
             or_(
                 User.username.ilike(f'%{query}%'),
                 User.email.ilike(f'%{query}%')
             )
         ).limit(limit).all()
         
-        users_data = []
-        for user in users:
-            user_dict = user.to_dict()
-            user_dict.update({
-                "posts_count": user.posts.count(),
-                "comments_count": user.comments.count()
-            })
-            users_data.append(user_dict)
+        users_data = [dict(row._mapping) for row in rows]
         
         return jsonify({
             "users": users_data,
@@ -239,25 +290,23 @@ def search_users():
 def get_flagged_posts():
  
     try:
-        if not hasattr(Post, 'is_flagged'):
-            return jsonify({"flagged_posts": [], "count": 0}), 200
-            
-        posts = Post.query.join(User, Post.user_id == User.id)\
-                         .filter(Post.is_flagged == True)\
-                         .order_by(Post.created_at.desc())\
-                         .all()
+        query = Post.query.join(User, Post.user_id == User.id)\
+                          .options(contains_eager(Post.user))\
+                          .filter(Post.is_flagged == True)
+        rows = posts_with_counts(query)\
+                    .order_by(Post.created_at.desc())\
+                    .all()
         
         posts_data = []
-        for post in posts:
+        for row in rows:
+            post = row[0]
             try:
-                post_dict = post.to_dict(include_author=True)
+                post_dict = post.to_dict(include_author=True, counts=row._mapping)
                
                 post_dict.update({
-                    "flagged_at": post.updated_at.isoformat() if hasattr(post, 'updated_at') and post.updated_at else post.created_at.isoformat(),
-                    "comments_count": post.comments.count(),
-                    "likes_count": post.likes_count,
-                    "vote_score": post.vote_score,
-                    "approved_comments": post.comments.filter_by(is_approved=True).count() if hasattr(Comment, 'is_approved') else post.comments.count()
+                    "flagged_at": post.updated_at or post.created_at,
+                    "comments_count": row.all_comments_count,
+                    "approved_comments": row.comments_count
                 })
             except Exception as e:
               
@@ -290,41 +339,22 @@ def get_flagged_posts():
 def get_flagged_comments():
     
     try:
-        if not hasattr(Comment, 'is_flagged'):
-            return jsonify({"flagged_comments": [], "count": 0}), 200
-            
-        comments = Comment.query.join(User, Comment.user_id == User.id)\
-                              .filter(Comment.is_flagged == True)\
-                              .order_by(Comment.created_at.desc())\
-                              .all()
+        query = Comment.query.join(User, Comment.user_id == User.id)\
+                             .options(contains_eager(Comment.user), joinedload(Comment.post))\
+                             .filter(Comment.is_flagged == True)
+        rows = comments_with_counts(query)\
+                    .order_by(Comment.created_at.desc(), Comment.id.desc())\
+                    .all()
         
         comments_data = []
-        for comment in comments:
-            try:
-                comment_dict = comment.to_dict(include_author=True)
-                
-                comment_dict.update({
-                    "flagged_at": comment.updated_at.isoformat() if hasattr(comment, 'updated_at') and comment.updated_at else comment.created_at.isoformat(),
-                    "post_title": comment.post.title if comment.post else "Unknown Post",
-                    "parent_comment_id": comment.parent_id,
-                    "likes_count": comment.likes_count,
-                    "vote_score": comment.vote_score
-                })
-            except Exception as e:
-                
-                comment_dict = {
-                    "id": comment.id,
-                    "content": comment.content,
-                    "user_id": comment.user_id,
-                    "post_id": comment.post_id,
-                    "author": {
-                        "id": comment.user.id,
-                        "username": comment.user.username
-                    } if comment.user else {"id": None, "username": "Unknown"},
-                    "created_at": comment.created_at.isoformat(),
-                    "is_flagged": getattr(comment, 'is_flagged', False),
-                    "is_approved": getattr(comment, 'is_approved', True)
-                }
+        for row in rows:
+            comment = row[0]
+            comment_dict = comment.to_dict(include_author=True, counts=row._mapping)
+            comment_dict.update({
+                "flagged_at": comment.updated_at or comment.created_at,
+                "post_title": comment.post.title if comment.post else "Unknown Post",
+                "parent_comment_id": comment.parent_id
+            })
             comments_data.append(comment_dict)
         
         return jsonify({
@@ -349,7 +379,14 @@ def get_all_users():
         search = request.args.get('search', '').strip()
         
         
-        query = User.query
+        query = db.session.query(
+            *_USER_LIST_COLUMNS,
+            _count_for_user(Post).label('posts_count'),
+            _count_for_user(Comment).label('comments_count'),
+            _count_for_user(Vote).label('votes_count'),
+            _count_for_user(Post, Post.is_flagged).label('flagged_posts'),
+            _count_for_user(Comment, Comment.is_flagged).label('flagged_comments')
+        )
         if search:
             query = query.filter(
                 or_(
@@ -359,36 +396,28 @@ def get_all_users():
             )
         
         
-        query = query.order_by(User.created_at.desc())
+        query = query.order_by(User.created_at.desc(), User.id.desc())
         
+        if 'before' in request.args:
+            limit = min(request.args.get('limit', KEYSET_DEFAULT_LIMIT, type=int), KEYSET_MAX_LIMIT)
+            if request.args['before']:
+                try:
+                    query = apply_cursor(query, User, decode_cursor(request.args['before']))
+                except ValueError:
+                    return jsonify({"error": "Invalid cursor"}), 400
+            rows = query.limit(limit).all()
+            return compressed_json({
+                "users": [dict(row._mapping) for row in rows],
+                "next_cursor": encode_cursor(rows[-1]) if len(rows) == limit else None
+            })
         
         users_pagination = query.paginate(
             page=page, per_page=per_page, error_out=False
         )
         
-        users_data = []
-        for user in users_pagination.items:
-            user_dict = user.to_dict()
-            
-            try:
-                user_dict.update({
-                    "posts_count": user.posts.count(),
-                    "comments_count": user.comments.count(),
-                    "votes_count": user.votes.count() if hasattr(user, 'votes') else 0
-                })
-                
-                
-                if hasattr(Post, 'is_flagged'):
-                    user_dict["flagged_posts"] = user.posts.filter_by(is_flagged=True).count()
-                if hasattr(Comment, 'is_flagged'):
-                    user_dict["flagged_comments"] = user.comments.filter_by(is_flagged=True).count()
-                    
-            except Exception as e:
-                current_app.logger.warning(f"Error adding user stats for user {user.id}: {e}")
-                
-            users_data.append(user_dict)
+        users_data = [dict(row._mapping) for row in users_pagination.items]
         
-        return jsonify({
+        return compressed_json({
             "users": users_data,
             "pagination": {
                 "page": page,
@@ -398,7 +427,7 @@ def get_all_users():
                 "has_prev": users_pagination.has_prev,
                 "has_next": users_pagination.has_next
             }
-        }), 200
+        })
         
     except Exception as e:
         current_app.logger.error(f"Error fetching users: {e}")
@@ -430,11 +459,11 @@ def get_all_posts():
             )
         
        
-        if status == 'approved' and hasattr(Post, 'is_approved'):
+        if status == 'approved':
             query = query.filter(Post.is_approved == True)
-        elif status == 'unapproved' and hasattr(Post, 'is_approved'):
+        elif status == 'unapproved':
             query = query.filter(Post.is_approved == False)
-        elif status == 'flagged' and hasattr(Post, 'is_flagged'):
+        elif status == 'flagged':
             query = query.filter(Post.is_flagged == True)
         
        
@@ -449,12 +478,11 @@ def get_all_posts():
         else:
             posts = query.all()
         
+        current_user = get_current_user()
         posts_data = []
         for post in posts:
             try:
                
-                current_user_id = get_jwt_identity()
-                current_user = User.query.get(current_user_id)
                 post_dict = post.to_dict(include_author=True, current_user=current_user)
                 
             except Exception as e:
@@ -517,7 +545,11 @@ def get_all_comments():
         user_id = request.args.get('user_id', type=int)
         
     
-        query = Comment.query.join(User, Comment.user_id == User.id)
+        current_user_id = get_jwt_identity()
+        current_user = get_current_user()
+
+        query = Comment.query.join(User, Comment.user_id == User.id)\
+                             .options(contains_eager(Comment.user), joinedload(Comment.post))
         
         if search:
             query = query.filter(Comment.content.ilike(f'%{search}%'))
@@ -529,24 +561,29 @@ def get_all_comments():
             query = query.filter_by(user_id=user_id)
         
   
-        query = query.order_by(Comment.created_at.desc())
-        
-        
-        if request.args.get('paginate', 'false').lower() == 'true':
-            comments_pagination = query.paginate(
-                page=page, per_page=per_page, error_out=False
-            )
-            comments = comments_pagination.items
+        query = comments_with_counts(query, current_user_id)\
+                    .order_by(Comment.created_at.desc(), Comment.id.desc())
+        
+        keyset = 'before' in request.args
+        if keyset:
+            limit = min(request.args.get('limit', KEYSET_DEFAULT_LIMIT, type=int), KEYSET_MAX_LIMIT)
+            if request.args['before']:
+                try:
+                    query = apply_cursor(query, Comment, decode_cursor(request.args['before']))
+                except ValueError:
+                    return jsonify({"error": "Invalid cursor"}), 400
+            rows = query.limit(limit).all()
+        elif request.args.get('paginate', 'false').lower() == 'true':
+            rows, has_next = page_with_probe(query, page, per_page)
         else:
-            comments = query.all()
+            rows = query.all()
         
+        comments = [row[0] for row in rows]
         comments_data = []
-        for comment in comments:
+        for comment, row in zip(comments, rows):
             try:
                
-                current_user_id = get_jwt_identity()
-                current_user = User.query.get(current_user_id)
-                comment_dict = comment.to_dict(include_author=True, current_user=current_user)
+                comment_dict = comment.to_dict(include_author=True, current_user=current_user, counts=row._mapping)
                 
                
                
@@ -571,23 +608,26 @@ def get_all_comments():
                     "is_approved": getattr(comment, 'is_approved', True),
                     "is_flagged": getattr(comment, 'is_flagged', False),
                     "post_title": comment.post.title if comment.post else "Unknown Post",
-                    "likes_count": comment.likes.count() if hasattr(comment, 'likes') else 0,
-                    "vote_score": sum(vote.value for vote in comment.votes) if hasattr(comment, 'votes') else 0
+                    "likes_count": row.likes_count,
+                    "vote_score": row.vote_score
                 }
                 
             comments_data.append(comment_dict)
         
        
-        if request.args.get('paginate', 'false').lower() == 'true':
+        if keyset:
+            return jsonify({
+                "comments": comments_data,
+                "next_cursor": encode_cursor(comments[-1]) if len(comments) == limit else None
+            }), 200
+        elif request.args.get('paginate', 'false').lower() == 'true':
             return jsonify({
                 "comments": comments_data,
                 "pagination": {
                     "page": page,
                     "per_page": per_page,
-                    "total": comments_pagination.total,
-                    "pages": comments_pagination.pages,
-                    "has_prev": comments_pagination.has_prev,
-                    "has_next": comments_pagination.has_next
+                    "has_prev": page > 1,
+                    "has_next": has_next
                 }
             }), 200
         else:
@@ -603,12 +643,14 @@ def get_all_comments():
 def toggle_block_user(user_id):
     
     try:
-        user = User.query.get_or_404(user_id)
-        
         current_user_id = get_jwt_identity()
         if user_id == int(current_user_id):
             return jsonify({"error": "Cannot block yourself"}), 400
         
+        user = db.session.get(User, user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
     
         data = request.get_json() or {}
         
@@ -620,9 +662,10 @@ def toggle_block_user(user_id):
             new_blocked_state = not user.is_blocked
         
         user.is_blocked = new_blocked_state
-        if hasattr(user, 'updated_at'):
-            user.updated_at = datetime.now(timezone.utc)
+        user.updated_at = datetime.now(timezone.utc)
         db.session.commit()
+        invalidate_dashboard()
+        invalidate_user_state(user_id)
         
         action = "blocked" if user.is_blocked else "unblocked"
         current_app.logger.info(f"User {user.username} (ID: {user.id}) {action} by admin {current_user_id}")
@@ -646,16 +689,21 @@ def toggle_block_user(user_id):
 def delete_user(user_id):
    
     try:
-        user = User.query.get_or_404(user_id)
-        
-        
         current_user_id = get_jwt_identity()
         if user_id == int(current_user_id):
             return jsonify({"error": "Cannot delete yourself"}), 400
         
+        user = db.session.get(User, user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
         username = user.username
         db.session.delete(user)
         db.session.commit()
+        invalidate_dashboard()
+        invalidate_user_state(user_id)
+        invalidate_comment_lists()
+        forget_comment_liker(user_id)
         
         current_app.logger.info(f"User {username} (ID: {user_id}) deleted by admin {current_user_id}")
         
@@ -675,17 +723,19 @@ def delete_user(user_id):
 def toggle_admin_status(user_id):
     
     try:
-        user = User.query.get_or_404(user_id)
-        
-        
         current_user_id = get_jwt_identity()
         if user_id == int(current_user_id):
             return jsonify({"error": "Cannot modify your own admin status"}), 400
         
+        user = db.session.get(User, user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
         user.is_admin = not user.is_admin
-        if hasattr(user, 'updated_at'):
-            user.updated_at = datetime.now(timezone.utc)
+        user.updated_at = datetime.now(timezone.utc)
         db.session.commit()
+        invalidate_dashboard()
+        invalidate_user_state(user_id)
         
         action = "promoted to admin" if user.is_admin else "demoted from admin"
         current_app.logger.info(f"User {user.username} (ID: {user.id}) {action} by admin {current_user_id}")
@@ -709,28 +759,21 @@ def toggle_admin_status(user_id):
 def approve_post(post_id):
     
     try:
-        post = Post.query.get_or_404(post_id)
-        
-        if not hasattr(Post, 'is_approved'):
-            return jsonify({"error": "Post approval not supported"}), 400
-        
-        data = request.get_json() or {}
-        if "is_approved" in data:
-            post.is_approved = bool(data["is_approved"])
-        else:
-            post.is_approved = not getattr(post, 'is_approved', True)
-
-        if hasattr(post, 'updated_at'):
-            post.updated_at = datetime.now(timezone.utc)
+        status = _set_status(Post, post_id, Post.is_approved, request.get_json() or {})
+        if status is None:
+            db.session.rollback()
+            return jsonify({"error": "Post not found"}), 404
+        is_approved = status.is_approved
         db.session.commit()
+        invalidate_dashboard()
 
-        action = "approved" if post.is_approved else "disapproved"
-        current_app.logger.info(f"Post {post.id} {action} by admin")
+        action = "approved" if is_approved else "disapproved"
+        current_app.logger.info(f"Post {post_id} {action} by admin")
 
         return jsonify({
             "success": True,
             "message": f"Post {action} successfully",
-            "is_approved": post.is_approved
+            "is_approved": is_approved
         }), 200
 
     except Exception as e:
@@ -743,28 +786,21 @@ def approve_post(post_id):
 def flag_post(post_id):
    
     try:
-        post = Post.query.get_or_404(post_id)
-        
-        if not hasattr(Post, 'is_flagged'):
-            return jsonify({"error": "Post flagging not supported"}), 400
-        
-        data = request.get_json() or {}
-        if "is_flagged" in data:
-            post.is_flagged = bool(data["is_flagged"])
-        else:
-            post.is_flagged = not getattr(post, 'is_flagged', False)
-
-        if hasattr(post, 'updated_at'):
-            post.updated_at = datetime.now(timezone.utc)
+        status = _set_status(Post, post_id, Post.is_flagged, request.get_json() or {})
+        if status is None:
+            db.session.rollback()
+            return jsonify({"error": "Post not found"}), 404
+        is_flagged = status.is_flagged
         db.session.commit()
+        invalidate_dashboard()
 
-        action = "flagged" if post.is_flagged else "unflagged"
-        current_app.logger.info(f"Post {post.id} {action} by admin")
+        action = "flagged" if is_flagged else "unflagged"
+        current_app.logger.info(f"Post {post_id} {action} by admin")
 
         return jsonify({
             "success": True,
             "message": f"Post {action} successfully",
-            "is_flagged": post.is_flagged
+            "is_flagged": is_flagged
         }), 200
 
     except Exception as e:
@@ -777,28 +813,22 @@ def flag_post(post_id):
 def approve_comment_admin(comment_id):
    
     try:
-        comment = Comment.query.get_or_404(comment_id)
-        
-        if not hasattr(Comment, 'is_approved'):
-            return jsonify({"error": "Comment approval not supported"}), 400
-        
-        data = request.get_json() or {}
-        if "is_approved" in data:
-            comment.is_approved = bool(data["is_approved"])
-        else:
-            comment.is_approved = not getattr(comment, 'is_approved', True)
-
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
+        status = _set_status(Comment, comment_id, Comment.is_approved, request.get_json() or {}, Comment.post_id)
+        if status is None:
+            db.session.rollback()
+            return jsonify({"error": "Comment not found"}), 404
+        is_approved, post_id = status
         db.session.commit()
+        invalidate_dashboard()
+        invalidate_comment_lists(post_id)
 
-        action = "approved" if comment.is_approved else "disapproved"
-        current_app.logger.info(f"Comment {comment.id} {action} by admin")
+        action = "approved" if is_approved else "disapproved"
+        current_app.logger.info(f"Comment {comment_id} {action} by admin")
 
         return jsonify({
             "success": True,
             "message": f"Comment {action} successfully",
-            "is_approved": comment.is_approved
+            "is_approved": is_approved
         }), 200
 
     except Exception as e:
@@ -811,28 +841,22 @@ def approve_comment_admin(comment_id):
 def flag_comment_admin(comment_id):
    
     try:
-        comment = Comment.query.get_or_404(comment_id)
-        
-        if not hasattr(Comment, 'is_flagged'):
-            return jsonify({"error": "Comment flagging not supported"}), 400
-        
-        data = request.get_json() or {}
-        if "is_flagged" in data:
-            comment.is_flagged = bool(data["is_flagged"])
-        else:
-            comment.is_flagged = not getattr(comment, 'is_flagged', False)
-
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
+        status = _set_status(Comment, comment_id, Comment.is_flagged, request.get_json() or {}, Comment.post_id)
+        if status is None:
+            db.session.rollback()
+            return jsonify({"error": "Comment not found"}), 404
+        is_flagged, post_id = status
         db.session.commit()
+        invalidate_dashboard()
+        invalidate_comment_lists(post_id)
 
-        action = "flagged" if comment.is_flagged else "unflagged"
-        current_app.logger.info(f"Comment {comment.id} {action} by admin")
+        action = "flagged" if is_flagged else "unflagged"
+        current_app.logger.info(f"Comment {comment_id} {action} by admin")
 
         return jsonify({
             "success": True,
             "message": f"Comment {action} successfully",
-            "is_flagged": comment.is_flagged
+            "is_flagged": is_flagged
         }), 200
 
     except Exception as e:
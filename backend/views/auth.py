@@ -1,17 +1,26 @@
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 )
 from flask_mail import Message
+from functools import wraps
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, or_, insert
+from sqlalchemy.dialects import postgresql, sqlite
 import re
 import os
-import traceback
+import atexit
+import json
+import queue
+import threading
+import time
 
 from models import db, User, TokenBlocklist, Post, Comment
+from .utils import (
+    simple_cache, hash_password, verify_password, password_needs_rehash,
+    password_length_plausible, burn_password_check, validate_password, ensure_dir, redis_client,
+    get_current_user as _current_user
+)
 
 
 auth_bp = Blueprint("auth", __name__)
@@ -20,48 +29,352 @@ auth_bp = Blueprint("auth", __name__)
 UPLOAD_FOLDER = 'uploads/avatars'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  
+MAX_UPLOAD_BODY = MAX_FILE_SIZE + 64 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_USERNAME_CHARS_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+HEALTH_CACHE_TTL = 5
+USER_COUNT_CACHE_TTL = 60
+
+BLOCKLIST_FLUSH_INTERVAL = 0.05
+BLOCKLIST_BATCH_SIZE = 500
+BLOCKLIST_PRUNE_INTERVAL = 3600
+
+_blocklist_queue = queue.SimpleQueue()
+_blocklist_pending = set()
+_blocklist_lock = threading.Lock()
+_flush_thread = None
+_BLOCKLIST_INSERT = insert(TokenBlocklist)
+_BLOCKLIST_UPSERTS = {
+    'postgresql': postgresql.insert(TokenBlocklist).on_conflict_do_nothing(index_elements=['jti']),
+    'sqlite': sqlite.insert(TokenBlocklist).on_conflict_do_nothing(index_elements=['jti']),
+}
+REDIS_BLOCKLIST_PREFIX = 'bl:'
+# Set once warm_redis_blocklist has copied every unexpired revocation into Redis; lives in the
+# same keyspace, so a FLUSH or a restart without persistence drops it along with the keys
+REDIS_BLOCKLIST_WARM_KEY = f"{REDIS_BLOCKLIST_PREFIX}warm"
+_redis = redis_client
+MAIL_IDLE_TIMEOUT = 15
+WELCOME_SUBJECT = "Welcome to MindThread!"
+_WELCOME_BODY = """Hi {username},
+
+Welcome to MindThread! We're excited to have you onboard.
+
+Your account has been created successfully. You can now:
+- Create and share your thoughts through posts
+- Engage with the community through comments
+- Like and vote on content you enjoy
+
+Happy posting!
+
+The MindThread Team"""
+
+CLOCK_RESOLUTION_NS = 100_000_000
+_clock = threading.local()
+
+_mail_queue = queue.Queue()
+_mail_lock = threading.Lock()
+_mail_thread = None
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+_IMAGE_EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'gif': '.gif'}
+
+def _sniff_image_type(stream):
+    """Identify an image by its magic bytes, leaving the stream at the start"""
+    head = stream.read(16)
+    stream.seek(0)
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    elif head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    elif head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    return None
+
+def _save_upload(file, file_path):
+    """Copy an upload to disk in fixed-size chunks; False if it exceeds MAX_FILE_SIZE
+
+    Werkzeug has already spooled the whole part (to a temp file past 500 KB) by the time
+    request.files is read, so this bounds the copy's memory, not the upload's; the
+    Content-Length check in upload_avatar and MAX_CONTENT_LENGTH are what cap the body.
+    """
+    written = 0
+    with open(file_path, 'wb') as dst:
+        while True:
+            chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return True
+            written += len(chunk)
+            if written > MAX_FILE_SIZE:
+                break
+            dst.write(chunk)
+    os.remove(file_path)
+    return False
+
+def _utcnow():
+    """UTC wall clock reused for up to 100 ms per thread, for non-audit timestamps"""
+    now_ns = time.time_ns()
+    if now_ns - getattr(_clock, 'ts_ns', 0) > CLOCK_RESOLUTION_NS:
+        _clock.dt = datetime.fromtimestamp(now_ns / 1e9, tz=timezone.utc)
+        _clock.ts_ns = now_ns
+    return _clock.dt
+
+def is_token_pending_revocation(jti):
+    """True if the token was revoked but the flush thread hasn't written it yet"""
+    with _blocklist_lock:
+        return jti in _blocklist_pending
+
+def is_token_revoked_in_redis(jti):
+    """Revocation status from Redis once it holds the whole blocklist, else None so the caller checks the database"""
+    if _redis is None:
+        return None
+    try:
+        revoked, warm = _redis.mget(f"{REDIS_BLOCKLIST_PREFIX}{jti}", REDIS_BLOCKLIST_WARM_KEY)
+    except Exception as e:
+        current_app.logger.warning(f"Redis blocklist lookup failed, using database: {e}")
+        return None
+    if revoked:
+        return True
+    return False if warm else None
+
+def _redis_revoke(jti, ttl):
+    if _redis is None:
+        return
+    try:
+        _redis.setex(f"{REDIS_BLOCKLIST_PREFIX}{jti}", ttl, 1)
+    except Exception as e:
+        current_app.logger.warning(f"Redis blocklist write failed for {jti}, using database until re-warmed: {e}")
+        try:
+            _redis.delete(REDIS_BLOCKLIST_WARM_KEY)
+        except Exception:
+            pass
+
+def warm_redis_blocklist():
+    """Copy unexpired blocklist rows into Redis, then mark it warm so token checks skip the database"""
+    if _redis is None:
+        return
+    ttl = current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+    now = datetime.now(timezone.utc)
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        rows = db.session.query(TokenBlocklist.jti, TokenBlocklist.created_at)\
+                         .filter(TokenBlocklist.created_at >= now - ttl)
+        for jti, created_at in rows:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            remaining = int((created_at + ttl - now).total_seconds())
+            if remaining > 0:
+                pipe.setex(f"{REDIS_BLOCKLIST_PREFIX}{jti}", remaining, 1)
+        pipe.execute()
+        _redis.set(REDIS_BLOCKLIST_WARM_KEY, 1)
+    except Exception as e:
+        current_app.logger.warning(f"Redis blocklist warm-up failed, using database: {e}")
+
+def _drain_blocklist_queue(limit=BLOCKLIST_BATCH_SIZE):
+    items = []
+    while len(items) < limit:
+        try:
+            items.append(_blocklist_queue.get_nowait())
+        except queue.Empty:
+            break
+    return items
+
+def _insert_blocklist_rows(items):
+    batch = dict(items)
+    upsert = _BLOCKLIST_UPSERTS.get(db.engine.dialect.name)
+    if upsert is not None:
+        existing = set()
+    else:
+        existing = {
+            jti for (jti,) in db.session.query(TokenBlocklist.jti)
+            .filter(TokenBlocklist.jti.in_(batch.keys()))
+        }
+    rows = [
+        {"jti": jti, "created_at": created_at}
+        for jti, created_at in batch.items() if jti not in existing
+    ]
+    if rows:
+        db.session.execute(upsert if upsert is not None else _BLOCKLIST_INSERT, rows)
+
+def _flush_blocklist(app, items, prune=False):
+    
+    try:
+        if items:
+            _insert_blocklist_rows(items)
+
+        if prune:
+            cutoff = datetime.now(timezone.utc) - app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+            TokenBlocklist.query.filter(TokenBlocklist.created_at < cutoff)\
+                                .delete(synchronize_session=False)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Token blocklist flush failed, requeueing {len(items)} tokens: {e}")
+        for item in items:
+            _blocklist_queue.put(item)
+        return False
+    finally:
+        db.session.remove()
+
+    with _blocklist_lock:
+        _blocklist_pending.difference_update(jti for jti, _ in items)
+    return True
+
+def _blocklist_flush_loop(app):
+    last_prune = time.monotonic()
+    while True:
+        items = _drain_blocklist_queue()
+        prune = time.monotonic() - last_prune >= BLOCKLIST_PRUNE_INTERVAL
+        if items or prune:
+            with app.app_context():
+                if _flush_blocklist(app, items, prune=prune) and prune:
+                    last_prune = time.monotonic()
+                    # Restores the warm marker a failed Redis write dropped
+                    warm_redis_blocklist()
+        time.sleep(BLOCKLIST_FLUSH_INTERVAL)
+
+def _flush_blocklist_on_exit(app):
+    """Write revocations still queued at interpreter shutdown instead of losing them with the daemon thread"""
+    while True:
+        items = _drain_blocklist_queue()
+        if not items:
+            return
+        with app.app_context():
+            if not _flush_blocklist(app, items):
+                app.logger.error(f"Token blocklist flush at shutdown failed; {_blocklist_queue.qsize()} revocations lost")
+                return
+
+def _start_blocklist_thread():
+    """Start the flush/prune thread once per process; it also runs without Redis, where it only prunes"""
+    global _flush_thread
+    with _blocklist_lock:
+        if _flush_thread is None:
+            app = current_app._get_current_object()
+            _flush_thread = threading.Thread(
+                target=_blocklist_flush_loop,
+                args=(app,),
+                name="token-blocklist-flush",
+                daemon=True
+            )
+            _flush_thread.start()
+            atexit.register(_flush_blocklist_on_exit, app)
+
+def queue_token_revocation(jti, created_at):
+    """Revoke a token now; with Redis the row is written by the background flush thread, otherwise inline"""
+    _start_blocklist_thread()
+    if _redis is None:
+        # Nothing else would carry the revocation across a crash or to other workers
+        try:
+            _insert_blocklist_rows([(jti, created_at)])
+            db.session.commit()
+            return
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Token blocklist write failed for {jti}, queueing it: {e}")
+    with _blocklist_lock:
+        _blocklist_pending.add(jti)
+    _blocklist_queue.put((jti, created_at))
+    _redis_revoke(jti, current_app.config["JWT_ACCESS_TOKEN_EXPIRES"])
+
 def validate_email(email):
     
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 def validate_username(username):
    
     if len(username) < 3 or len(username) > 20:
         return False, "Username must be 3-20 characters long"
     
-    if not re.match(r'^[a-zA-Z0-9_]+$', username):
+    if not _USERNAME_CHARS_RE.match(username):
         return False, "Username can only contain letters, numbers, and underscores"
     
     return True, "Valid"
 
-def validate_password(password):
+def _build_welcome_email(email, username):
+    msg = Message(
+        WELCOME_SUBJECT,
+        recipients=[email]
+    )
+    msg.body = _WELCOME_BODY.format(username=username)
+    return msg
+
+def _close_mail_connection(conn):
+    if conn is not None:
+        try:
+            conn.__exit__(None, None, None)
+        except Exception:
+            pass
+    return None
+
+def _mail_connection_alive(conn):
+    if conn.host is None:
+        return True
+    try:
+        return conn.host.noop()[0] == 250
+    except Exception:
+        return False
+
+def _mail_worker_loop(app):
+    """Send queued welcome emails over one SMTP connection kept open while busy"""
+    conn = None
+    while True:
+        try:
+            batch = [_mail_queue.get(timeout=MAIL_IDLE_TIMEOUT)]
+        except queue.Empty:
+            conn = _close_mail_connection(conn)
+            continue
+        while True:
+            try:
+                batch.append(_mail_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        with app.app_context():
+            for email, username in batch:
+                try:
+                    if conn is not None and not _mail_connection_alive(conn):
+                        conn = _close_mail_connection(conn)
+                    if conn is None:
+                        conn = app.extensions['mail'].connect().__enter__()
+                    conn.send(_build_welcome_email(email, username))
+                    app.logger.info(f"Welcome email sent to {email}")
+                except Exception as e:
+                    conn = _close_mail_connection(conn)
+                    app.logger.warning(f"Email send failed for {email}: {e}")
+
+def queue_welcome_email(email, username):
     
-    if len(password) < 6:
-        return False, "Password must be at least 6 characters"
-    if len(password) > 100:
-        return False, "Password too long (max 100 characters)"
-    return True, "Valid"
+    global _mail_thread
+    if _mail_thread is None:
+        with _mail_lock:
+            if _mail_thread is None:
+                _mail_thread = threading.Thread(
+                    target=_mail_worker_loop,
+                    args=(current_app._get_current_object(),),
+                    name="welcome-mail",
+                    daemon=True
+                )
+                _mail_thread.start()
+    _mail_queue.put((email, username))
 
 def admin_required(f):
    
+    @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            user = _current_user()
             
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
-            if not getattr(user, 'is_admin', False):
+            if not user.is_admin:
                 return jsonify({"error": "Admin privileges required"}), 403
             
-            if getattr(user, 'is_blocked', False):
+            if user.is_blocked:
                 return jsonify({"error": "Account is blocked"}), 403
             
             return f(*args, **kwargs)
@@ -69,7 +382,6 @@ def admin_required(f):
             current_app.logger.error(f"Admin check error: {e}")
             return jsonify({"error": "Authorization failed"}), 500
     
-    decorated_function.__name__ = f.__name__
     return decorated_function
 
 @auth_bp.route("/register", methods=["POST"])
@@ -105,21 +417,21 @@ def register():
             return jsonify({"error": password_message}), 400
         
         
-        existing_email = User.query.filter_by(email=email).first()
-        if existing_email:
+        conflicts = db.session.query(User.email, User.username)\
+                              .filter(or_(func.lower(User.email) == email, User.username == username))\
+                              .limit(2).all()
+        if any(row.email.lower() == email for row in conflicts):
             return jsonify({"error": "Email already exists"}), 409
-        
-        existing_username = User.query.filter_by(username=username).first()
-        if existing_username:
+        if conflicts:
             return jsonify({"error": "Username already exists"}), 409
         
        
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = hash_password(password)
         new_user = User(
             username=username,
             email=email,
             password_hash=hashed_pw,
-            created_at=datetime.now(timezone.utc),
+            created_at=_utcnow(),
             is_blocked=False,
             is_admin=False,
             is_active=True,
@@ -136,24 +448,7 @@ def register():
       
         try:
             if current_app.extensions.get('mail'):
-                msg = Message(
-                    "Welcome to MindThread!",
-                    recipients=[new_user.email]
-                )
-                msg.body = f"""Hi {new_user.username},
-
-Welcome to MindThread! We're excited to have you onboard.
-
-Your account has been created successfully. You can now:
-- Create and share your thoughts through posts
-- Engage with the community through comments
-- Like and vote on content you enjoy
-
-Happy posting!
-
-The MindThread Team"""
-                current_app.extensions['mail'].send(msg)
-                current_app.logger.info(f"Welcome email sent to {new_user.email}")
+                queue_welcome_email(new_user.email, new_user.username)
         except Exception as e:
             current_app.logger.warning(f"Email send failed for {new_user.email}: {e}")
         
@@ -175,8 +470,7 @@ The MindThread Team"""
         
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Registration error: {e}")
-        current_app.logger.error(f"Traceback: {traceback.format_exc()}")
+        current_app.logger.exception(f"Registration error: {e}")
         return jsonify({"error": "Registration failed. Please try again."}), 500
 
 @auth_bp.route("/login", methods=["POST"])
@@ -191,7 +485,7 @@ def login():
      
         email_or_username = data.get("email", "").strip()
         username = data.get("username", "").strip()
-        password = data.get("password", "").strip()
+        password = data.get("password", "")
         
       
         login_field = email_or_username if email_or_username else username
@@ -199,25 +493,39 @@ def login():
         if not login_field or not password:
             return jsonify({"error": "Email/username and password are required"}), 400
         
+        if not password_length_plausible(password):
+            current_app.logger.warning(f"Login failed: Implausible password length for {login_field}")
+            return jsonify({"error": "Invalid credentials"}), 401
+        
       
         user = None
         if '@' in login_field:
            
-            user = User.query.filter_by(email=login_field.lower()).first()
+            user = User.query.filter(func.lower(User.email) == login_field.lower()).first()
         else:
           
             user = User.query.filter_by(username=login_field).first()
         
         if not user:
+            burn_password_check(password)
             current_app.logger.warning(f"Login failed: No user found for {login_field}")
             return jsonify({"error": "Invalid credentials"}), 401
         
       
-        if not check_password_hash(user.password_hash, password):
+        if not verify_password(user.password_hash, password):
             current_app.logger.warning(f"Login failed: Password mismatch for {login_field}")
             return jsonify({"error": "Invalid credentials"}), 401
         
         
+        if password_needs_rehash(user.password_hash):
+            try:
+                user.password_hash = hash_password(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.warning(f"Password rehash failed for user {user.id}: {e}")
+        
+        
         if getattr(user, 'is_blocked', False):
             return jsonify({"error": "Your account has been blocked. Contact support."}), 403
         
@@ -249,8 +557,7 @@ def login():
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Login error: {e}")
-        current_app.logger.error(f"Traceback: {traceback.format_exc()}")
+        current_app.logger.exception(f"Login error: {e}")
         return jsonify({"error": "Login failed. Please try again."}), 500
 
 @auth_bp.route("/me", methods=["GET"])
@@ -258,8 +565,7 @@ def login():
 def get_current_user():
   
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -291,8 +597,7 @@ def get_current_user():
 def update_current_user():
   
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -328,7 +633,7 @@ def update_current_user():
             
           
             existing_user = User.query.filter(
-                User.email == new_email,
+                func.lower(User.email) == new_email,
                 User.id != user.id
             ).first()
             if existing_user:
@@ -338,7 +643,7 @@ def update_current_user():
         
        
         if hasattr(user, 'updated_at'):
-            user.updated_at = datetime.now(timezone.utc)
+            user.updated_at = _utcnow()
         
         db.session.commit()
         
@@ -368,8 +673,7 @@ def update_current_user():
 def refresh_token():
     
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -398,12 +702,10 @@ def logout():
    
     try:
         jti = get_jwt()["jti"]
-        now = datetime.now(timezone.utc)
+        now = _utcnow()
         
        
-        blocked_token = TokenBlocklist(jti=jti, created_at=now)
-        db.session.add(blocked_token)
-        db.session.commit()
+        queue_token_revocation(jti, now)
         
       
         user_id = get_jwt_identity()
@@ -415,7 +717,6 @@ def logout():
         }), 200
         
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"Logout error: {e}")
         return jsonify({"error": "Logout failed"}), 500
 
@@ -424,8 +725,7 @@ def logout():
 def change_password():
    
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -438,14 +738,15 @@ def change_password():
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        current_password = data.get("current_password", "").strip()
-        new_password = data.get("new_password", "").strip()
+        current_password = data.get("current_password", "")
+        new_password = data.get("new_password", "")
         
         if not current_password or not new_password:
             return jsonify({"error": "Current and new password are required"}), 400
         
        
-        if not check_password_hash(user.password_hash, current_password):
+        if not password_length_plausible(current_password) or \
+                not verify_password(user.password_hash, current_password):
             return jsonify({"error": "Current password is incorrect"}), 401
         
      
@@ -454,9 +755,9 @@ def change_password():
             return jsonify({"error": password_message}), 400
         
    
-        user.password_hash = generate_password_hash(new_password)
+        user.password_hash = hash_password(new_password)
         if hasattr(user, 'updated_at'):
-            user.updated_at = datetime.now(timezone.utc)
+            user.updated_at = _utcnow()
         db.session.commit()
         
      
@@ -477,8 +778,7 @@ def change_password():
 def verify_token():
    
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -510,8 +810,7 @@ def verify_token():
 def upload_avatar():
     
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = _current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -519,6 +818,8 @@ def upload_avatar():
         if getattr(user, 'is_blocked', False):
             return jsonify({"error": "Account is blocked"}), 403
 
+        if request.content_length and request.content_length > MAX_UPLOAD_BODY:
+            return jsonify({"error": "File too large. Maximum size is 5MB"}), 413
        
         if 'avatar' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -528,35 +829,28 @@ def upload_avatar():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        if file and allowed_file(file.filename):
+        image_type = _sniff_image_type(file.stream) if file and allowed_file(file.filename) else None
+        if image_type:
           
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+            ensure_dir(UPLOAD_FOLDER)
             
            
-            filename = secure_filename(file.filename)
-           
-            name, ext = os.path.splitext(filename)
+            # The extension comes from the bytes, so a PNG named .gif is still served as .png
+            ext = _IMAGE_EXTENSIONS[image_type]
             filename = f"user_{user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
             
             file_path = os.path.join(UPLOAD_FOLDER, filename)
             
            
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-            file.seek(0)
-            
-            if file_size > MAX_FILE_SIZE:
+            if not _save_upload(file, file_path):
                 return jsonify({"error": "File too large. Maximum size is 5MB"}), 413
             
-           
-            file.save(file_path)
-            
          
             avatar_url = f"/uploads/avatars/{filename}"
             user.avatar_url = avatar_url
             
             if hasattr(user, 'updated_at'):
-                user.updated_at = datetime.now(timezone.utc)
+                user.updated_at = _utcnow()
             
             db.session.commit()
 
@@ -613,50 +907,61 @@ def verify_email():
     }), 501
 
 
+_TEST_JSON = json.dumps({
+    "success": True,
+    "message": "Authentication system is working",
+    "endpoints": {
+        "register": "POST /api/register",
+        "login": "POST /api/login", 
+        "logout": "POST /api/logout",
+        "refresh": "POST /api/refresh",
+        "me": "GET /api/me",
+        "change_password": "POST /api/change-password",
+        "verify_token": "GET /api/verify-token",
+        "upload_avatar": "POST /api/upload-avatar",  
+        "upload_avatar_alt": "POST /api/users/me/avatar"  
+    },
+    "features": [
+        "Email/username login support",
+        "Automatic token refresh",
+        "Token blacklisting on logout",
+        "Comprehensive validation",
+        "Welcome email notifications",
+        "Security logging",
+        "Profile management",
+        "Avatar upload support"  
+    ]
+}).encode()
+
 @auth_bp.route("/test", methods=["GET"])
 def test_auth():
     """Test authentication endpoints"""
-    return jsonify({
-        "success": True,
-        "message": "Authentication system is working",
-        "endpoints": {
-            "register": "POST /api/register",
-            "login": "POST /api/login", 
-            "logout": "POST /api/logout",
-            "refresh": "POST /api/refresh",
-            "me": "GET /api/me",
-            "change_password": "POST /api/change-password",
-            "verify_token": "GET /api/verify-token",
-            "upload_avatar": "POST /api/upload-avatar",  
-            "upload_avatar_alt": "POST /api/users/me/avatar"  
-        },
-        "features": [
-            "Email/username login support",
-            "Automatic token refresh",
-            "Token blacklisting on logout",
-            "Comprehensive validation",
-            "Welcome email notifications",
-            "Security logging",
-            "Profile management",
-            "Avatar upload support"  
-        ]
-    }), 200
+    return Response(_TEST_JSON, status=200, mimetype='application/json')
 
 
 @auth_bp.route("/health", methods=["GET"])
 def auth_health():
    
     try:
+        cached = simple_cache("auth_health")
+        if cached is not None:
+            return Response(cached, status=200, mimetype='application/json')
         
-        user_count = User.query.count()
+        db.session.execute(db.text("SELECT 1")).scalar()
+        user_count = simple_cache("auth_health:user_count")
+        if user_count is None:
+            user_count = db.session.query(func.count(User.id)).scalar()
+            simple_cache("auth_health:user_count", user_count, ttl=USER_COUNT_CACHE_TTL)
         
-        return jsonify({
+        body = json.dumps({
             "status": "healthy",
             "service": "authentication",
             "database": "connected",
             "user_count": user_count,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }), 200
+            "timestamp": _utcnow().isoformat()
+        }).encode()
+        simple_cache("auth_health", body, ttl=HEALTH_CACHE_TTL)
+        return Response(body, status=200, mimetype='application/json')
         
     except Exception as e:
         current_app.logger.error(f"Auth health check failed: {e}")
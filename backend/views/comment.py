@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from models import db, Comment, User, Post, Like
+from sqlalchemy import func, select, exists, literal, insert, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timezone
-import traceback
+from functools import wraps
 import logging
 
 
@@ -11,36 +15,127 @@ try:
 except ImportError:
     def block_check_required(f):
        
+        @wraps(f)
         def wrapper(*args, **kwargs):
             try:
                 current_user_id = get_jwt_identity()
-                current_user = User.query.get(current_user_id)
+                current_user = db.session.get(User, current_user_id)
                 if current_user and current_user.is_blocked:
                     return jsonify({"error": "User is blocked"}), 403
                 return f(*args, **kwargs)
             except Exception as e:
                 return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
         return wrapper
 
+from .utils import (
+    get_user_state, get_current_user, invalidate_comment_lists, comment_list_cache, comment_list_cache_key,
+    cached_comment_list, conditional_json, estimated_row_count, encode_cursor, decode_cursor, apply_cursor,
+    KEYSET_DEFAULT_LIMIT, KEYSET_MAX_LIMIT, LIKE_WRITE_BEHIND, buffer_comment_like, page_with_probe
+)
+
 logger = logging.getLogger(__name__)
 
 comment_bp = Blueprint('comments', __name__)
 
-def serialize_comment_with_stats(comment, current_user_id=None, include_admin_info=False):
+COMMENT_LIST_CACHE_TTL = 30
+COMMENT_MAX_LENGTH = 1000
+COMMENT_RAW_MAX_LENGTH = COMMENT_MAX_LENGTH * 4
+# Optional model capabilities, resolved once at import rather than per request
+COMMENT_FEATURES = {
+    "approval_system": hasattr(Comment, 'is_approved'),
+    "change_tracking": hasattr(Comment, 'content_hash'),
+    "flagging_system": hasattr(Comment, 'is_flagged'),
+}
+_LIKE_UPSERTS = {
+    'postgresql': postgresql.insert(Like).on_conflict_do_nothing(index_elements=['user_id', 'comment_id']),
+    'sqlite': sqlite.insert(Like).on_conflict_do_nothing(index_elements=['user_id', 'comment_id']),
+}
+
+def comment_stat_columns(current_user_id=None):
+    """Labelled like count, caller's like flag and approved reply count for a Comment query"""
+    if current_user_id:
+        liked_by_user = exists().where(Like.comment_id == Comment.id, Like.user_id == current_user_id)
+    else:
+        liked_by_user = literal(False)
+    return [
+        Comment.likes_count.label('likes_count'),
+        liked_by_user.label('liked_by_user'),
+        Comment.replies_count.label('replies_count')
+    ]
+
+def with_comment_stats(query, current_user_id=None):
+    """Add like count, the caller's like flag and approved reply count to a Comment query"""
+    return query.add_columns(*comment_stat_columns(current_user_id))
+
+def select_comment_rows(current_user_id=None):
+    """Plain column projection of a comment, its author and its stats; serialize_comment_row unpacks it by position"""
+    return select(
+        Comment.id,
+        Comment.content,
+        Comment.post_id,
+        Comment.user_id,
+        Comment.parent_id,
+        Comment.created_at,
+        Comment.updated_at,
+        Comment.is_approved,
+        Comment.is_flagged,
+        User.id.label('author_id'),
+        User.username.label('author_username'),
+        User.avatar_url.label('author_avatar_url'),
+        *comment_stat_columns(current_user_id)
+    ).outerjoin(User, User.id == Comment.user_id)
+
+def serialize_comment_row(row):
+    """Same shape as serialize_comment_with_stats, built from a select_comment_rows row"""
+    (comment_id, content, post_id, user_id, parent_id, created_at, updated_at, is_approved, is_flagged,
+     author_id, author_username, author_avatar_url, likes_count, liked_by_user, replies_count) = row
+    if author_id is not None:
+        author = {'id': author_id, 'username': author_username, 'avatar_url': author_avatar_url}
+    else:
+        author = {"id": None, "username": "Unknown"}
+        author_username = "Unknown"
+    return {
+        'id': comment_id,
+        'content': content,
+        'post_id': post_id,
+        'user_id': user_id,
+        'parent_id': parent_id,
+        'author': author,
+        'username': author_username,
+        'created_at': created_at,
+        'updated_at': updated_at,
+        'is_approved': is_approved,
+        'is_flagged': is_flagged,
+        'likes_count': likes_count,
+        'liked_by_user': bool(liked_by_user),
+        'replies_count': replies_count,
+        'requires_reapproval': False,
+        'has_content_changed': False,
+    }
+
+def collect_comment_stats(rows):
+    """Split (Comment, likes_count, liked_by_user, replies_count) rows into comments and a stats map"""
+    comments = [row[0] for row in rows]
+    stats = {
+        comment.id: (likes_count, bool(liked_by_user), replies_count)
+        for comment, likes_count, liked_by_user, replies_count in rows
+    }
+    return comments, stats
+
+def serialize_comment_with_stats(comment, current_user_id=None, include_admin_info=False, stats=None):
    
     try:
       
-        likes_count = Like.query.filter_by(comment_id=comment.id).count()
-        liked_by_user = False
-        if current_user_id:
-            liked_by_user = (
-                Like.query.filter_by(comment_id=comment.id, user_id=current_user_id).first()
-                is not None
-            )
+        if stats is not None:
+            likes_count, liked_by_user, replies_count = stats
+        else:
+            liked_by_user = bool(current_user_id) and db.session.query(
+                exists().where(Like.comment_id == comment.id, Like.user_id == current_user_id)
+            ).scalar()
+            likes_count, replies_count = comment.likes_count, comment.replies_count
         
        
-        author = User.query.get(comment.user_id)
+        author = comment.user
         
        
         data = {
@@ -52,49 +147,26 @@ def serialize_comment_with_stats(comment, current_user_id=None, include_admin_in
             'author': {
                 'id': author.id,
                 'username': author.username,
-                'avatar_url': getattr(author, 'avatar_url', None)
+                'avatar_url': author.avatar_url
             } if author else {"id": None, "username": "Unknown"},
             'username': author.username if author else "Unknown",
-            'created_at': comment.created_at.isoformat() if comment.created_at else None,
-            'updated_at': comment.updated_at.isoformat() if hasattr(comment, 'updated_at') and comment.updated_at else None,
-            'is_approved': getattr(comment, 'is_approved', True),
-            'is_flagged': getattr(comment, 'is_flagged', False),
+            'created_at': comment.created_at,
+            'updated_at': comment.updated_at,
+            'is_approved': comment.is_approved,
+            'is_flagged': comment.is_flagged,
             'likes_count': likes_count,
             'liked_by_user': liked_by_user,
-            'replies_count': Comment.query.filter_by(parent_id=comment.id, is_approved=True).count(),
+            'replies_count': replies_count,
+            'requires_reapproval': False,
+            'has_content_changed': False,
         }
         
-     
-        if hasattr(comment, 'approved_at'):
-            data['approved_at'] = comment.approved_at.isoformat() if comment.approved_at else None
-        
-        if hasattr(comment, 'requires_reapproval'):
-            data['requires_reapproval'] = comment.requires_reapproval()
-        else:
-            data['requires_reapproval'] = False
-            
-        if hasattr(comment, 'has_content_changed'):
-            data['has_content_changed'] = comment.has_content_changed()
-        else:
-            data['has_content_changed'] = False
-        
-       
-        if include_admin_info and hasattr(comment, 'approved_by') and comment.approved_by:
-            approver = User.query.get(comment.approved_by)
-            if approver:
-                data['approved_by'] = {
-                    'id': approver.id,
-                    'username': approver.username
-                }
-            if hasattr(comment, 'original_content'):
-                data['original_content'] = comment.original_content
-        
         return data
         
     except Exception as e:
         logger.error(f"Error serializing comment {comment.id}: {e}")
        
-        author = User.query.get(comment.user_id)
+        author = comment.user
         return {
             'id': comment.id,
             'content': comment.content,
@@ -107,14 +179,23 @@ def serialize_comment_with_stats(comment, current_user_id=None, include_admin_in
             } if author else {"id": None, "username": "Unknown"},
             'username': author.username if author else "Unknown",
             'created_at': comment.created_at.isoformat() if comment.created_at else None,
-            'is_approved': getattr(comment, 'is_approved', True),
-            'is_flagged': getattr(comment, 'is_flagged', False),
+            'is_approved': comment.is_approved,
+            'is_flagged': comment.is_flagged,
             'likes_count': 0,
             'liked_by_user': False,
             'requires_reapproval': False,
             'has_content_changed': False
         }
 
+def _load_user_and_comment(user_id, comment_id):
+   
+    row = db.session.query(User, Comment)\
+                    .outerjoin(Comment, Comment.id == comment_id)\
+                    .options(joinedload(Comment.user))\
+                    .filter(User.id == user_id)\
+                    .first()
+    return row if row else (None, None)
+
 @comment_bp.route("/posts/<int:post_id>/comments", methods=["GET"])
 def get_post_comments(post_id):
     """Get comments for a specific post - Hide disapproved comments from general users"""
@@ -126,20 +207,27 @@ def get_post_comments(post_id):
             verify_jwt_in_request(optional=True)
             current_user_id = get_jwt_identity()
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_user_state(current_user_id)
         except:
             pass
 
+        cacheable = not (current_user and current_user['is_admin'])
+        cache_key = comment_list_cache_key(post_id, current_user_id)
+        etag = None
+        if cacheable:
+            cached, etag = cached_comment_list(cache_key, ttl=COMMENT_LIST_CACHE_TTL)
+            if cached is not None:
+                return cached
       
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": "Post not found"}), 404
 
        
-        query = Comment.query.filter_by(post_id=post_id)
+        query = select_comment_rows(current_user_id).where(Comment.post_id == post_id)
         
      
-        if current_user and current_user.is_admin:
+        if current_user and current_user['is_admin']:
          
             pass
         else:
@@ -156,63 +244,87 @@ def get_post_comments(post_id):
                 query = query.filter(Comment.is_approved == True)
         
       
-        comments = query.order_by(Comment.created_at.asc()).all()
-        
-        
-        include_admin_info = current_user and current_user.is_admin
-        comments_data = [
-            serialize_comment_with_stats(c, current_user_id, include_admin_info) 
-            for c in comments
-        ]
-        
-        return jsonify(comments_data), 200
+        query = query.order_by(Comment.created_at.asc(), Comment.id.asc())
+        keyset = "after" in request.args
+        if keyset:
+            limit = max(1, min(request.args.get("limit", KEYSET_DEFAULT_LIMIT, type=int), KEYSET_MAX_LIMIT))
+            if request.args["after"]:
+                try:
+                    query = apply_cursor(query, Comment, decode_cursor(request.args["after"]), ascending=True)
+                except ValueError:
+                    return jsonify({"error": "Invalid cursor"}), 400
+            query = query.limit(limit)
+
+        rows = db.session.execute(query).all()
+        comments_data = [serialize_comment_row(row) for row in rows]
+        
+        if keyset:
+            body = jsonify({
+                "comments": comments_data,
+                "next_cursor": encode_cursor(rows[-1]) if rows and len(rows) == limit else None
+            }).get_data()
+        else:
+            body = jsonify(comments_data).get_data()
+        if cacheable:
+            comment_list_cache(cache_key, body, ttl=COMMENT_LIST_CACHE_TTL)
+        return conditional_json(body, etag)
 
     except Exception as e:
         logger.error(f"Error fetching comments for post {post_id}: {e}")
         return jsonify({"error": "Failed to fetch comments", "message": str(e)}), 500
 
+def _comment_content(raw, empty_error):
+    """(stripped content, None) or (None, error response), checked before any database work"""
+    if raw is None:
+        raw = ""
+    if not isinstance(raw, str):
+        return None, (jsonify({"error": "Comment content must be a string"}), 400)
+    if len(raw) > COMMENT_RAW_MAX_LENGTH:
+        return None, (jsonify({"error": f"Comment content too long (max {COMMENT_MAX_LENGTH} characters)"}), 413)
+    content = raw.strip()
+    if not content:
+        return None, (jsonify({"error": empty_error}), 400)
+    if len(content) > COMMENT_MAX_LENGTH:
+        return None, (jsonify({"error": f"Comment content too long (max {COMMENT_MAX_LENGTH} characters)"}), 400)
+    return content, None
+
 @comment_bp.route("/posts/<int:post_id>/comments", methods=["POST"])
 @jwt_required()
 @block_check_required
 def create_post_comment(post_id):
   
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user:
-            return jsonify({"error": "User not found"}), 404
-
-       
-        post = Post.query.get(post_id)
-        if not post:
-            return jsonify({"error": "Post not found"}), 404
-
-        data = request.get_json()
-        if not data:
+        data = request.get_json(silent=True, cache=False)
+        if not data or not isinstance(data, dict):
             return jsonify({"error": "No JSON body provided"}), 400
 
-        content = data.get("content", "").strip()
-        parent_id = data.get("parent_id")
+        content, error = _comment_content(data.get("content"), "Comment content is required")
+        if error:
+            return error
 
-        if not content:
-            return jsonify({"error": "Comment content is required"}), 400
+        parent_id = data.get("parent_id") or None
+        if parent_id is not None:
+            try:
+                parent_id = int(parent_id)
+            except (TypeError, ValueError):
+                return jsonify({"error": "Invalid parent_id format"}), 400
 
-        if len(content) > 1000:
-            return jsonify({"error": "Comment content too long (max 1000 characters)"}), 400
+        current_user_id = get_jwt_identity()
+        current_user = get_current_user()
+        
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
 
       
         if parent_id:
-            try:
-                parent_id = int(parent_id)
-                parent_comment = Comment.query.get(parent_id)
-                if not parent_comment or parent_comment.post_id != post_id:
-                    return jsonify({"error": "Invalid parent comment"}), 400
-              
-                if not parent_comment.is_approved and not current_user.is_admin:
-                    return jsonify({"error": "Cannot reply to unapproved comment"}), 400
-            except ValueError:
-                return jsonify({"error": "Invalid parent_id format"}), 400
+            parent_comment = db.session.execute(
+                select(Comment.post_id, Comment.is_approved).where(Comment.id == parent_id)
+            ).first()
+            if not parent_comment or parent_comment.post_id != post_id:
+                return jsonify({"error": "Invalid parent comment"}), 400
+          
+            if not parent_comment.is_approved and not current_user.is_admin:
+                return jsonify({"error": "Cannot reply to unapproved comment"}), 400
 
        
         is_approved = current_user.is_admin
@@ -221,26 +333,26 @@ def create_post_comment(post_id):
         comment = Comment(
             content=content,
             post_id=post_id,
-            user_id=current_user_id,
+            user=current_user,
             parent_id=parent_id,
-            created_at=datetime.now(timezone.utc),
             is_approved=is_approved,
             is_flagged=False
         )
 
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
-
-   
-        if is_approved and hasattr(comment, 'approve'):
-            comment.approve(current_user)
-
-        db.session.add(comment)
-        db.session.commit()
-
-      
-        include_admin_info = current_user.is_admin
-        comment_data = serialize_comment_with_stats(comment, current_user_id, include_admin_info)
+        try:
+            db.session.add(comment)
+            db.session.flush()
+          
+            comment_data = serialize_comment_with_stats(
+                comment, current_user_id, current_user.is_admin, stats=(0, False, 0)
+            )
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'parent_id' in str(e.orig):
+                return jsonify({"error": "Invalid parent comment"}), 400
+            return jsonify({"error": "Post not found"}), 404
+        invalidate_comment_lists(post_id)
         
         if not is_approved:
             comment_data['message'] = 'Comment posted successfully and is pending admin approval'
@@ -265,26 +377,29 @@ def get_comment(comment_id):
             verify_jwt_in_request(optional=True)
             current_user_id = get_jwt_identity()
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_user_state(current_user_id)
         except:
             pass
 
-        comment = Comment.query.get(comment_id)
-        if not comment:
+        row = with_comment_stats(Comment.query.options(joinedload(Comment.user)), current_user_id)\
+                .filter(Comment.id == comment_id)\
+                .first()
+        if not row:
             return jsonify({"error": "Comment not found"}), 404
+        [comment], stats = collect_comment_stats([row])
 
      
         can_view = (
-            getattr(comment, 'is_approved', True) or 
-            (current_user and current_user.is_admin) or  
+            comment.is_approved or 
+            (current_user and current_user['is_admin']) or  
             (current_user_id == comment.user_id)  
         )
 
         if not can_view:
             return jsonify({"error": "Comment not found"}), 404
 
-        include_admin_info = current_user and current_user.is_admin
-        comment_data = serialize_comment_with_stats(comment, current_user_id, include_admin_info)
+        include_admin_info = current_user and current_user['is_admin']
+        comment_data = serialize_comment_with_stats(comment, current_user_id, include_admin_info, stats[comment.id])
         return jsonify(comment_data), 200
 
     except Exception as e:
@@ -297,79 +412,49 @@ def get_comment(comment_id):
 def update_comment(comment_id):
    
     try:
+        data = request.get_json(silent=True, cache=False)
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "No JSON body provided"}), 400
+
+        new_content = None
+        if 'content' in data:
+            new_content, error = _comment_content(data['content'], "Content cannot be empty")
+            if error:
+                return error
+
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        comment = Comment.query.get(comment_id)
+        current_user, comment = _load_user_and_comment(current_user_id, comment_id)
         
         if not current_user:
             return jsonify({"error": "User not found"}), 404
         if not comment:
             return jsonify({"error": "Comment not found"}), 404
-        if comment.user_id != current_user_id and not current_user.is_admin:
+        is_author = str(comment.user_id) == str(current_user_id)
+        if not is_author and not current_user.is_admin:
             return jsonify({"error": "Permission denied"}), 403
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No JSON body provided"}), 400
-
       
-        content_changed = False
         requires_reapproval = False
         message = "Comment updated successfully"
 
        
-        if 'content' in data:
-            new_content = data['content'].strip()
-            if not new_content: 
-                return jsonify({"error": "Content cannot be empty"}), 400
-            if len(new_content) > 1000:
-                return jsonify({"error": "Comment content too long (max 1000 characters)"}), 400
-            
+        if new_content is not None:
             if comment.content != new_content:
-                content_changed = True
-                old_content = comment.content
                 comment.content = new_content
                 
                
-                if not current_user.is_admin and comment.user_id == current_user_id:
-                    if hasattr(comment, 'requires_reapproval'):
-                        requires_reapproval = comment.requires_reapproval()
-                    elif getattr(comment, 'is_approved', True):
-                     
-                        requires_reapproval = True
+                if not current_user.is_admin and is_author:
+                    requires_reapproval = comment.is_approved
 
         if current_user.is_admin:
             if 'is_approved' in data: 
                 new_approval_state = bool(data['is_approved'])
                 
+                comment.is_approved = new_approval_state
                 if new_approval_state:
-                   
-                    can_approve = (
-                        not getattr(comment, 'is_approved', True) or  
-                        content_changed or  
-                        (hasattr(comment, 'has_content_changed') and comment.has_content_changed()) or  
-                        not hasattr(comment, 'approved_at') or comment.approved_at is None  
-                    )
-                    
-                    if can_approve:
-                        if hasattr(comment, 'approve'):
-                            comment.approve(current_user)
-                        else:
-                            comment.is_approved = True
-                            comment.approved_by = current_user_id
-                            comment.approved_at = datetime.now(timezone.utc)
-                        requires_reapproval = False
-                        message = "Comment approved successfully"
-                    else:
-                        return jsonify({
-                            "error": "Comment cannot be approved - no changes detected since last approval"
-                        }), 400
+                    requires_reapproval = False
+                    message = "Comment approved successfully"
                 else:
-                  
-                    if hasattr(comment, 'disapprove'):
-                        comment.disapprove()
-                    else:
-                        comment.is_approved = False
                     message = "Comment disapproved successfully"
                         
             if 'is_flagged' in data: 
@@ -380,15 +465,11 @@ def update_comment(comment_id):
            
             if requires_reapproval:
                 comment.is_approved = False
-                comment.approved_by = None
-                comment.approved_at = None
                 message = "Comment updated successfully and is pending admin approval due to content changes"
 
-       
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
-        
+        post_id = comment.post_id
         db.session.commit()
+        invalidate_comment_lists(post_id)
 
         include_admin_info = current_user.is_admin
         comment_data = serialize_comment_with_stats(comment, current_user_id, include_admin_info)
@@ -408,24 +489,22 @@ def delete_comment(comment_id):
   
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        comment = Comment.query.get(comment_id)
+        current_user = get_current_user()
+        comment = db.session.execute(
+            select(Comment.user_id, Comment.post_id).where(Comment.id == comment_id)
+        ).first()
         
         if not current_user:
             return jsonify({"error": "User not found"}), 404
         if not comment:
             return jsonify({"error": "Comment not found"}), 404
-        if comment.user_id != current_user_id and not current_user.is_admin:
+        if str(comment.user_id) != str(current_user_id) and not current_user.is_admin:
             return jsonify({"error": "Permission denied"}), 403
 
       
-        Like.query.filter_by(comment_id=comment_id).delete()
-        
-      
-        Comment.query.filter_by(parent_id=comment_id).delete()
-        
-        db.session.delete(comment)
+        db.session.execute(delete(Comment).where(Comment.id == comment_id))
         db.session.commit()
+        invalidate_comment_lists(comment.post_id)
         
         return jsonify({"message": "Comment deleted successfully"}), 200
 
@@ -434,58 +513,102 @@ def delete_comment(comment_id):
         logger.error(f"Error deleting comment {comment_id}: {e}")
         return jsonify({"error": "Failed to delete comment", "message": str(e)}), 500
 
+def _likeable_comment(comment_id, current_user_id):
+   
+    row = db.session.execute(
+        select(Comment.post_id, Comment.user_id, Comment.is_approved).where(Comment.id == comment_id)
+    ).first()
+    if row is None:
+        return None, (jsonify({"error": "Comment not found"}), 404)
+
+    current_user = get_user_state(current_user_id)
+    can_interact = (
+        row.is_approved or
+        (current_user and current_user['is_admin']) or
+        (str(current_user_id) == str(row.user_id))
+    )
+    if not can_interact:
+        return None, (jsonify({"error": "Cannot interact with this comment"}), 403)
+    return row.post_id, None
+
+def _buffered_like_response(comment_id, current_user_id, message, liked):
+    likes_count = buffer_comment_like(comment_id, current_user_id, liked)
+    return jsonify({
+        "message": message,
+        "likes": likes_count,
+        "likes_count": likes_count,
+        "liked_by_user": liked
+    }), 200
+
+def _like_response(comment_id, post_id, changed, message, liked):
+    """Commit a like write and return the trigger-maintained count as of that write"""
+    # Read inside the write's transaction: the trigger's UPDATE holds the comment row lock until
+    # commit, so concurrent likes can't slip in between the write and this count
+    likes_count = db.session.execute(
+        select(Comment.likes_count).where(Comment.id == comment_id)
+    ).scalar()
+    db.session.commit()
+    if changed:
+        invalidate_comment_lists(post_id)
+
+    return jsonify({
+        "message": message,
+        "likes": likes_count,
+        "likes_count": likes_count,
+        "liked_by_user": liked
+    }), 200
+
 @comment_bp.route("/comments/<int:comment_id>/like", methods=["POST"])
 @jwt_required()
 @block_check_required
-def toggle_comment_like(comment_id):
+def like_comment(comment_id):
  
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        comment = Comment.query.get(comment_id)
-        
-        if not comment:
-            return jsonify({"error": "Comment not found"}), 404
+        post_id, error = _likeable_comment(comment_id, current_user_id)
+        if error:
+            return error
+        if LIKE_WRITE_BEHIND:
+            return _buffered_like_response(comment_id, current_user_id, "Comment liked", True)
+
+        values = dict(comment_id=comment_id, user_id=current_user_id, created_at=datetime.now(timezone.utc))
+        upsert = _LIKE_UPSERTS.get(db.engine.dialect.name)
+        changed = 0
+        if upsert is not None:
+            changed = db.session.execute(upsert.values(**values)).rowcount
+        elif not db.session.query(exists().where(Like.comment_id == comment_id, Like.user_id == current_user_id)).scalar():
+            changed = db.session.execute(insert(Like).values(**values)).rowcount
+
+        return _like_response(comment_id, post_id, changed, "Comment liked", True)
 
-      
-        can_interact = (
-            getattr(comment, 'is_approved', True) or  
-            (current_user and current_user.is_admin) or  
-            (current_user_id == comment.user_id)  
-        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error liking comment {comment_id}: {e}")
+        return jsonify({"error": "Failed to like comment", "message": str(e)}), 500
 
-        if not can_interact:
-            return jsonify({"error": "Cannot interact with this comment"}), 403
+@comment_bp.route("/comments/<int:comment_id>/like", methods=["DELETE"])
+@jwt_required()
+@block_check_required
+def unlike_comment(comment_id):
+ 
+    try:
+        current_user_id = get_jwt_identity()
+        post_id, error = _likeable_comment(comment_id, current_user_id)
+        if error:
+            return error
+        if LIKE_WRITE_BEHIND:
+            return _buffered_like_response(comment_id, current_user_id, "Comment unliked", False)
 
-        existing = Like.query.filter_by(comment_id=comment_id, user_id=current_user_id).first()
-        if existing:
-            db.session.delete(existing)
-            message = "Comment unliked"
-            liked = False
-        else:
-            new_like = Like(
-                comment_id=comment_id,
-                user_id=current_user_id,
-                created_at=datetime.now(timezone.utc)
-            )
-            db.session.add(new_like)
-            message = "Comment liked"
-            liked = True
+        changed = db.session.execute(
+            delete(Like).where(Like.comment_id == comment_id, Like.user_id == current_user_id)
+        ).rowcount
 
-        db.session.commit()
-        
-        likes_count = Like.query.filter_by(comment_id=comment_id).count()
-        return jsonify({
-            "message": message,
-            "likes": likes_count,
-            "likes_count": likes_count,
-            "liked_by_user": liked
-        }), 200
+        return _like_response(comment_id, post_id, changed, "Comment unliked", False)
 
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error toggling like on comment {comment_id}: {e}")
-        return jsonify({"error": "Failed to toggle like", "message": str(e)}), 500
+        logger.error(f"Error unliking comment {comment_id}: {e}")
+        return jsonify({"error": "Failed to unlike comment", "message": str(e)}), 500
 
 
 @comment_bp.route("/comments", methods=["GET"])
@@ -499,34 +622,46 @@ def list_comments():
             verify_jwt_in_request(optional=True)
             current_user_id = get_jwt_identity()
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_user_state(current_user_id)
         except:
             pass
 
        
         post_id = request.args.get("post_id", type=int)
+        cacheable = not (current_user and current_user['is_admin'])
+        cache_key = comment_list_cache_key(post_id or "all", current_user_id)
+        etag = None
+        if cacheable:
+            cached, etag = cached_comment_list(cache_key, ttl=COMMENT_LIST_CACHE_TTL)
+            if cached is not None:
+                return cached
         user_id = request.args.get("user_id", type=int)
         all_comments = request.args.get("all", "").lower() == "true"
         admin_mode = request.args.get("admin", "").lower() == "true"
         pending_only = request.args.get("pending", "").lower() == "true"
         flagged_only = request.args.get("flagged", "").lower() == "true"
-        limit = min(request.args.get("limit", 100, type=int), 500)
+        keyset = "before" in request.args
+        if keyset:
+            limit = max(1, min(request.args.get("limit", KEYSET_DEFAULT_LIMIT, type=int), KEYSET_MAX_LIMIT))
+        else:
+            limit = max(1, min(request.args.get("limit", 100, type=int), 500))
+        before_id = request.args.get("before_id", type=int)
 
       
-        query = Comment.query
+        query = select_comment_rows(current_user_id)
 
       
         if post_id:
-            query = query.filter_by(post_id=post_id)
+            query = query.where(Comment.post_id == post_id)
         if user_id:
-            query = query.filter_by(user_id=user_id)
+            query = query.where(Comment.user_id == user_id)
 
     
         if pending_only:
             query = query.filter(Comment.is_approved == False)
         elif flagged_only:
             query = query.filter(Comment.is_flagged == True)
-        elif not (current_user and current_user.is_admin and (all_comments or admin_mode)):
+        elif not (current_user and current_user['is_admin'] and (all_comments or admin_mode)):
            
             if current_user_id:
                 query = query.filter(
@@ -538,129 +673,55 @@ def list_comments():
             else:
                 query = query.filter(Comment.is_approved == True)
 
+        if keyset and request.args["before"]:
+            try:
+                query = apply_cursor(query, Comment, decode_cursor(request.args["before"]))
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+        elif before_id:
+            anchor = db.session.query(Comment.created_at).filter(Comment.id == before_id).scalar()
+            if anchor is not None:
+                query = query.filter(
+                    db.or_(
+                        Comment.created_at < anchor,
+                        db.and_(Comment.created_at == anchor, Comment.id < before_id)
+                    )
+                )
+            else:
+                query = query.filter(Comment.id < before_id)
+
     
-        comments = query.order_by(Comment.created_at.desc()).limit(limit).all()
-        
-      
-        include_admin_info = current_user and current_user.is_admin
-        comments_data = [
-            serialize_comment_with_stats(c, current_user_id, include_admin_info) 
-            for c in comments
-        ]
-        
-        return jsonify(comments_data), 200
+        rows = db.session.execute(
+            query.order_by(Comment.created_at.desc(), Comment.id.desc()).limit(limit)
+        ).all()
+        comments_data = [serialize_comment_row(row) for row in rows]
+        
+        if keyset:
+            response = jsonify({
+                "comments": comments_data,
+                "next_cursor": encode_cursor(rows[-1]) if rows and len(rows) == limit else None
+            })
+        else:
+            response = jsonify(comments_data)
+        body = response.get_data()
+        if cacheable:
+            comment_list_cache(cache_key, body, ttl=COMMENT_LIST_CACHE_TTL)
+        return conditional_json(body, etag)
 
     except Exception as e:
         logger.error(f"Error fetching comments: {e}")
         return jsonify({"error": "Failed to fetch comments", "message": str(e)}), 500
 
 
-@comment_bp.route("/admin/comments/<int:comment_id>/approve", methods=["PATCH"])
-@jwt_required()
-def admin_approve_comment(comment_id):
-   
-    try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or not current_user.is_admin:
-            return jsonify({"error": "Admin access required"}), 403
-
-        comment = Comment.query.get(comment_id)
-        if not comment:
-            return jsonify({"error": "Comment not found"}), 404
-
-        data = request.get_json() or {}
-        is_approved = bool(data.get('is_approved', True))
-        
-        if is_approved:
-            
-            can_approve = (
-                not getattr(comment, 'is_approved', True) or  
-                (hasattr(comment, 'has_content_changed') and comment.has_content_changed()) or  
-                not hasattr(comment, 'approved_at') or comment.approved_at is None  
-            )
-            
-            if not can_approve:
-                return jsonify({
-                    "error": "Comment cannot be approved - no changes detected since last approval"
-                }), 400
-            
-            
-            if hasattr(comment, 'approve'):
-                comment.approve(current_user)
-            else:
-                comment.is_approved = True
-                comment.approved_by = current_user_id
-                comment.approved_at = datetime.now(timezone.utc)
-        else:
-           
-            if hasattr(comment, 'disapprove'):
-                comment.disapprove()
-            else:
-                comment.is_approved = False
-
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
-        
-        db.session.commit()
-
-        action = 'approved' if is_approved else 'rejected'
-        include_admin_info = True
-        return jsonify({
-            "message": f"Comment {action} successfully",
-            "comment": serialize_comment_with_stats(comment, current_user_id, include_admin_info)
-        }), 200
-
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error approving comment {comment_id}: {e}")
-        return jsonify({"error": "Failed to update approval", "message": str(e)}), 500
-
-@comment_bp.route("/admin/comments/<int:comment_id>/flag", methods=["PATCH"])
-@jwt_required()
-def admin_flag_comment(comment_id):
-   
-    try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
-        if not current_user or not current_user.is_admin:
-            return jsonify({"error": "Admin access required"}), 403
-
-        comment = Comment.query.get(comment_id)
-        if not comment:
-            return jsonify({"error": "Comment not found"}), 404
-
-        data = request.get_json() or {}
-        is_flagged = bool(data.get('is_flagged', True))
-
-        comment.is_flagged = is_flagged
-        if hasattr(comment, 'updated_at'):
-            comment.updated_at = datetime.now(timezone.utc)
-        db.session.commit()
-
-        action = 'flagged' if is_flagged else 'unflagged'
-        include_admin_info = True
-        return jsonify({
-            "message": f"Comment {action} successfully",
-            "comment": serialize_comment_with_stats(comment, current_user_id, include_admin_info)
-        }), 200
-
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error flagging comment {comment_id}: {e}")
-        return jsonify({"error": "Failed to flag comment", "message": str(e)}), 500
-
 @comment_bp.route("/admin/comments/pending", methods=["GET"])
 @jwt_required()
 def get_pending_comments():
  
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_user_state(current_user_id)
         
-        if not current_user or not current_user.is_admin:
+        if not current_user or not current_user['is_admin']:
             return jsonify({"error": "Admin access required"}), 403
 
      
@@ -668,21 +729,20 @@ def get_pending_comments():
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         
         
-        pending_query = Comment.query.filter_by(is_approved=False)\
+        pending_query = with_comment_stats(Comment.query.options(joinedload(Comment.user)), current_user_id)\
+                                    .filter(Comment.is_approved == False)\
                                     .order_by(Comment.created_at.desc())
         
      
         if request.args.get('paginate', 'false').lower() == 'true':
-            pagination = pending_query.paginate(
-                page=page, per_page=per_page, error_out=False
-            )
-            pending_comments = pagination.items
+            pending_comments, has_next = page_with_probe(pending_query, page, per_page)
         else:
             pending_comments = pending_query.all()
         
+        pending_comments, stats = collect_comment_stats(pending_comments)
         include_admin_info = True
         comments_data = [
-            serialize_comment_with_stats(c, current_user_id, include_admin_info) 
+            serialize_comment_with_stats(c, current_user_id, include_admin_info, stats[c.id])
             for c in pending_comments
         ]
         
@@ -696,10 +756,8 @@ def get_pending_comments():
             response_data["pagination"] = {
                 "page": page,
                 "per_page": per_page,
-                "total": pagination.total,
-                "pages": pagination.pages,
-                "has_prev": pagination.has_prev,
-                "has_next": pagination.has_next
+                "has_prev": page > 1,
+                "has_next": has_next
             }
         
         return jsonify(response_data), 200
@@ -714,19 +772,21 @@ def get_flagged_comments():
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_user_state(current_user_id)
         
-        if not current_user or not current_user.is_admin:
+        if not current_user or not current_user['is_admin']:
             return jsonify({"error": "Admin access required"}), 403
 
      
-        flagged_comments = Comment.query.filter_by(is_flagged=True)\
+        rows = with_comment_stats(Comment.query.options(joinedload(Comment.user)), current_user_id)\
+                                       .filter(Comment.is_flagged == True)\
                                        .order_by(Comment.created_at.desc())\
                                        .all()
+        flagged_comments, stats = collect_comment_stats(rows)
         
         include_admin_info = True
         comments_data = [
-            serialize_comment_with_stats(c, current_user_id, include_admin_info) 
+            serialize_comment_with_stats(c, current_user_id, include_admin_info, stats[c.id])
             for c in flagged_comments
         ]
         
@@ -745,9 +805,9 @@ def get_comment_stats():
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_user_state(current_user_id)
         
-        if not current_user or not current_user.is_admin:
+        if not current_user or not current_user['is_admin']:
             return jsonify({"error": "Admin access required"}), 403
 
       
@@ -779,18 +839,14 @@ def get_comment_stats():
 def test_comments():
     """Test endpoint to verify comments system is working"""
     try:
-        comment_count = Comment.query.count()
-        
-       
-        approved_count = 0
-        flagged_count = 0
-        pending_count = 0
-        
-        if hasattr(Comment, 'is_approved'):
-            approved_count = Comment.query.filter_by(is_approved=True).count()
-            pending_count = Comment.query.filter_by(is_approved=False).count()
-        if hasattr(Comment, 'is_flagged'):
-            flagged_count = Comment.query.filter_by(is_flagged=True).count()
+        comment_count = estimated_row_count(Comment)
+        approved_count, pending_count, flagged_count = db.session.execute(
+            select(
+                func.count().filter(Comment.is_approved == True),
+                func.count().filter(Comment.is_approved == False),
+                func.count().filter(Comment.is_flagged == True)
+            )
+        ).one()
         
         return jsonify({
             "success": True,
@@ -800,9 +856,7 @@ def test_comments():
             "pending_comments": pending_count,
             "flagged_comments": flagged_count,
             "features": {
-                "approval_system": hasattr(Comment, 'is_approved'),
-                "change_tracking": hasattr(Comment, 'content_hash'),
-                "flagging_system": hasattr(Comment, 'is_flagged'),
+                **COMMENT_FEATURES,
                 "voting_system": False, 
                 "like_system": True,
                 "reply_system": True,
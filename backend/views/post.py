@@ -1,16 +1,22 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from models import db, Post, User, Comment, Like, Vote
-from datetime import datetime
+from sqlalchemy import select, insert, delete, exists, func, case, literal
+from sqlalchemy.orm import selectinload
+from datetime import datetime, timezone
 import logging
 
+from .utils import invalidate_comment_lists, comments_with_counts, get_current_user
+
 logger = logging.getLogger(__name__)
 
 post_bp = Blueprint('posts', __name__)
 
-def serialize_comment(comment):
+def serialize_comment(comment, counts=None):
     """Serialize a comment object to dict"""
-    author = User.query.get(comment.user_id)
+    author = comment.user
+    if counts is None:
+        counts = comment
     return {
         'id': comment.id,
         'content': comment.content,
@@ -22,17 +28,27 @@ def serialize_comment(comment):
             'username': author.username,
             'avatar_url': author.avatar_url
         } if author else {"id": None, "username": "Unknown"},
-        'created_at': comment.created_at.isoformat() if comment.created_at else None,
-        'updated_at': comment.updated_at.isoformat() if comment.updated_at else None,
+        'created_at': comment.created_at,
+        'updated_at': comment.updated_at,
         'is_approved': comment.is_approved,
         'is_flagged': comment.is_flagged,
-        'likes_count': comment.likes_count,
-        'vote_score': comment.vote_score,
-        'upvotes_count': comment.upvotes_count,
-        'downvotes_count': comment.downvotes_count
+        'likes_count': counts.likes_count,
+        'vote_score': counts.vote_score,
+        'upvotes_count': counts.upvotes_count,
+        'downvotes_count': counts.downvotes_count
     }
 
-def serialize_post(post, current_user_id=None, include_comments=False):
+def post_like_stats(post_ids, current_user_id=None):
+    """{post_id: (likes_count, liked_by_user)} for a page of posts, read straight off the likes table"""
+    liked = func.max(case((Like.user_id == current_user_id, 1), else_=0)) if current_user_id else literal(0)
+    rows = db.session.execute(
+        select(Like.post_id, func.count(), liked)
+        .where(Like.post_id.in_(post_ids))
+        .group_by(Like.post_id)
+    )
+    return {post_id: (likes_count, bool(user_liked)) for post_id, likes_count, user_liked in rows}
+
+def serialize_post(post, current_user_id=None, include_comments=False, like_stats=None):
 
     try:
        
@@ -45,17 +61,13 @@ def serialize_post(post, current_user_id=None, include_comments=False):
             uv = Vote.query.filter_by(post_id=post.id, user_id=current_user_id).first()
             user_vote = uv.value if uv else None
 
-        likes_count = Like.query.filter_by(post_id=post.id).count()
-        liked_by_user = False
-        if current_user_id:
-            liked_by_user = (
-                Like.query.filter_by(post_id=post.id, user_id=current_user_id).first()
-                is not None
-            )
+        if like_stats is None:
+            like_stats = post_like_stats([post.id], current_user_id)
+        likes_count, liked_by_user = like_stats.get(post.id, (0, False))
 
         
         comments_count = Comment.query.filter_by(post_id=post.id, is_approved=True).count()
-        author = User.query.get(post.user_id)
+        author = db.session.get(User, post.user_id)
 
         data = {
             'id': post.id,
@@ -68,8 +80,8 @@ def serialize_post(post, current_user_id=None, include_comments=False):
                 'username': author.username,
                 'avatar_url': author.avatar_url
             } if author else {"id": None, "username": "Unknown"},
-            'created_at': post.created_at.isoformat() if post.created_at else None,
-            'updated_at': post.updated_at.isoformat() if post.updated_at else None,
+            'created_at': post.created_at,
+            'updated_at': post.updated_at,
             'is_approved': post.is_approved,
             'is_flagged': post.is_flagged,
             'vote_score': vote_score,
@@ -85,16 +97,16 @@ def serialize_post(post, current_user_id=None, include_comments=False):
 
         if include_comments:
             
-            comments_query = Comment.query.filter_by(post_id=post.id)
+            comments_query = Comment.query.options(selectinload(Comment.user)).filter_by(post_id=post.id)
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_current_user()
                 if not (current_user and current_user.is_admin):
                     comments_query = comments_query.filter_by(is_approved=True)
             else:
                 comments_query = comments_query.filter_by(is_approved=True)
             
-            comments = comments_query.order_by(Comment.created_at.desc()).all()
-            data['comments'] = [serialize_comment(c) for c in comments]
+            rows = comments_with_counts(comments_query).order_by(Comment.created_at.desc()).all()
+            data['comments'] = [serialize_comment(row[0], row) for row in rows]
 
         return data
 
@@ -130,7 +142,7 @@ def get_posts():
             verify_jwt_in_request(optional=True)
             current_user_id = get_jwt_identity()
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_current_user()
         except:
             pass
 
@@ -166,7 +178,8 @@ def get_posts():
             query = query.order_by(sort_col.asc())
 
         posts = query.limit(per_page).offset((page-1)*per_page).all()
-        result = [serialize_post(p, current_user_id) for p in posts]
+        like_stats = post_like_stats([p.id for p in posts], current_user_id)
+        result = [serialize_post(p, current_user_id, like_stats=like_stats) for p in posts]
         return jsonify(result), 200
 
     except Exception as e:
@@ -179,7 +192,7 @@ def create_post():
     
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         data = request.get_json(silent=True)
         if not data:
@@ -202,8 +215,8 @@ def create_post():
             content=content,
             tags=tags,
             user_id=current_user_id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
             is_approved=is_approved,  
             is_flagged=False
         )
@@ -234,11 +247,11 @@ def get_post(post_id):
             verify_jwt_in_request(optional=True)
             current_user_id = get_jwt_identity()
             if current_user_id:
-                current_user = User.query.get(current_user_id)
+                current_user = get_current_user()
         except:
             pass
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({'error':'Post not found'}), 404
 
@@ -265,12 +278,12 @@ def update_post(post_id):
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
      
         logger.info(f"Update attempt - Post ID: {post_id}, Current User ID: {current_user_id}, Type: {type(current_user_id)}")
         
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             logger.warning(f"Post {post_id} not found")
             return jsonify({'error': 'Post not found'}), 404
@@ -338,7 +351,7 @@ def update_post(post_id):
             post.is_approved = False
 
        
-        post.updated_at = datetime.utcnow()
+        post.updated_at = datetime.now(timezone.utc)
         db.session.commit()
 
         
@@ -366,8 +379,8 @@ def delete_post(post_id):
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        post = Post.query.get(post_id)
+        current_user = get_current_user()
+        post = db.session.get(Post, post_id)
         
         if not post:
             return jsonify({'error':'Post not found'}), 404
@@ -377,10 +390,10 @@ def delete_post(post_id):
      
         Like.query.filter_by(post_id=post_id).delete()
         Vote.query.filter_by(post_id=post_id).delete()
-        Comment.query.filter_by(post_id=post_id).delete()
         
         db.session.delete(post)
         db.session.commit()
+        invalidate_comment_lists(post_id)
         return jsonify({'message':'Post deleted successfully'}), 200
 
     except Exception as e:
@@ -394,29 +407,32 @@ def toggle_like(post_id):
   
     try:
         current_user_id = get_jwt_identity()
-        post = Post.query.get(post_id)
-        
-        if not post:
+        liked_clause = (Like.post_id == post_id) & (Like.user_id == current_user_id)
+        existing = db.session.execute(
+            select(Post.id, exists().where(liked_clause)).where(Post.id == post_id)
+        ).first()
+
+        if not existing:
             return jsonify({'error':'Post not found'}), 404
 
-        existing = Like.query.filter_by(post_id=post_id, user_id=current_user_id).first()
-        if existing:
-            db.session.delete(existing)
+        if existing[1]:
+            db.session.execute(delete(Like).where(liked_clause))
             message = 'Post unliked'
             liked = False
         else:
-            new_like = Like(
+            db.session.execute(insert(Like).values(
                 post_id=post_id,
                 user_id=current_user_id,
-                created_at=datetime.utcnow()
-            )
-            db.session.add(new_like)
+                created_at=datetime.now(timezone.utc)
+            ))
             message = 'Post liked'
             liked = True
 
         db.session.commit()
         
-        likes_count = Like.query.filter_by(post_id=post_id).count()
+        likes_count = db.session.execute(
+            select(func.count()).select_from(Like).where(Like.post_id == post_id)
+        ).scalar()
         return jsonify({
             'message': message,
             'likes': likes_count,
@@ -437,7 +453,7 @@ def admin_get_all_posts():
 
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({'error':'Admin access required'}), 403
@@ -459,7 +475,8 @@ def admin_get_all_posts():
         query = query.order_by(Post.created_at.desc())
         posts = query.limit(per_page).offset((page-1)*per_page).all()
         
-        result = [serialize_post(p, current_user_id) for p in posts]
+        like_stats = post_like_stats([p.id for p in posts], current_user_id)
+        result = [serialize_post(p, current_user_id, like_stats=like_stats) for p in posts]
         return jsonify(result), 200
 
     except Exception as e:
@@ -472,12 +489,12 @@ def approve_post(post_id):
   
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({'error':'Admin access required'}), 403
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({'error':'Post not found'}), 404
 
@@ -487,7 +504,7 @@ def approve_post(post_id):
 
         is_approved = bool(data.get('is_approved', True))
         post.is_approved = is_approved
-        post.updated_at = datetime.utcnow()
+        post.updated_at = datetime.now(timezone.utc)
         
        
         if not is_approved and 'reason' in data:
@@ -513,12 +530,12 @@ def admin_flag_post(post_id):
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({'error':'Admin access required'}), 403
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({'error':'Post not found'}), 404
 
@@ -526,7 +543,7 @@ def admin_flag_post(post_id):
         is_flagged = bool(data.get('is_flagged', True)) if data else True
 
         post.is_flagged = is_flagged
-        post.updated_at = datetime.utcnow()
+        post.updated_at = datetime.now(timezone.utc)
         db.session.commit()
 
         action = 'flagged' if is_flagged else 'unflagged'
@@ -546,7 +563,7 @@ def get_unapproved_posts():
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({'error':'Admin access required'}), 403
@@ -556,7 +573,8 @@ def get_unapproved_posts():
                          .order_by(Post.created_at.desc())\
                          .all()
         
-        result = [serialize_post(p, current_user_id) for p in posts]
+        like_stats = post_like_stats([p.id for p in posts], current_user_id)
+        result = [serialize_post(p, current_user_id, like_stats=like_stats) for p in posts]
         return jsonify(result), 200
 
     except Exception as e:
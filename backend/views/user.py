@@ -1,9 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime, timezone, timedelta
+from functools import wraps
 from models import db, User, Post, Comment, Vote
 
 # Import utils if available, otherwise define a simple decorator
@@ -12,18 +12,20 @@ try:
 except ImportError:
     def block_check_required(f):
         """Simple decorator if utils not available"""
+        @wraps(f)
         def wrapper(*args, **kwargs):
             try:
                 current_user_id = get_jwt_identity()
-                current_user = User.query.get(current_user_id)
+                current_user = db.session.get(User, current_user_id)
                 if current_user and current_user.is_blocked:
                     return jsonify({"error": "User is blocked"}), 403
                 return f(*args, **kwargs)
             except Exception as e:
                 return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
         return wrapper
 
+from .utils import hash_password, verify_password, validate_password, invalidate_user_state, invalidate_comment_lists, forget_comment_liker, ensure_dir, get_current_user
+
 # Create Blueprint - matches app.py registration pattern
 user_bp = Blueprint('users', __name__)
 
@@ -73,7 +75,7 @@ def get_user_data_dict(user):
 def fetch_all_users():
     """Get all users (admin only) or search users"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
@@ -124,7 +126,7 @@ def fetch_all_users():
 def create_user():
     """Create a new user (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
 
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
@@ -136,14 +138,15 @@ def create_user():
 
         username = data["username"].strip()
         email = data["email"].strip().lower()
-        password = data["password"].strip()
+        password = data["password"]
 
         # Validate input
         if len(username) < 3:
             return jsonify({"error": "Username must be at least 3 characters"}), 400
         
-        if len(password) < 6:
-            return jsonify({"error": "Password must be at least 6 characters"}), 400
+        password_valid, password_message = validate_password(password)
+        if not password_valid:
+            return jsonify({"error": password_message}), 400
 
         # Check for existing users
         if User.query.filter_by(email=email).first():
@@ -156,7 +159,7 @@ def create_user():
         new_user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             is_admin=data.get("is_admin", False),
             is_blocked=data.get("is_blocked", False),
             is_active=data.get("is_active", True),
@@ -187,13 +190,13 @@ def fetch_user_by_id(user_id):
     """Get user by ID (own profile or admin) - UPDATED with avatar support"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         # Check permissions
         if current_user_id != user_id and (not current_user or not current_user.is_admin):
             return jsonify({"error": "Access denied"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -233,7 +236,7 @@ def fetch_user_by_id(user_id):
 def fetch_current_user():
     """Get current user profile - UPDATED with avatar and better stats support"""
     try:
-        user = User.query.get(get_jwt_identity())
+        user = get_current_user()
 
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -334,7 +337,7 @@ def fetch_current_user():
 def update_current_user():
     """Update current user profile"""
     try:
-        user = User.query.get(get_jwt_identity())
+        user = get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -379,13 +382,14 @@ def update_current_user():
 
         # Handle password change separately
         if 'current_password' in data and 'new_password' in data:
-            if not check_password_hash(user.password_hash, data['current_password']):
+            if not verify_password(user.password_hash, data['current_password']):
                 return jsonify({"error": "Current password is incorrect"}), 400
             
-            if len(data['new_password']) < 6:
-                return jsonify({"error": "New password must be at least 6 characters"}), 400
+            password_valid, password_message = validate_password(data['new_password'])
+            if not password_valid:
+                return jsonify({"error": password_message}), 400
             
-            user.password_hash = generate_password_hash(data['new_password'])
+            user.password_hash = hash_password(data['new_password'])
             updated = True
 
         if updated:
@@ -414,7 +418,7 @@ def update_current_user():
 def delete_current_user():
     """Delete current user's own account"""
     try:
-        user = User.query.get(get_jwt_identity())
+        user = get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -439,6 +443,9 @@ def delete_current_user():
         # Delete user (cascade should handle related posts, comments, votes)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user_state(deleted_user_info["id"])
+        invalidate_comment_lists()
+        forget_comment_liker(deleted_user_info["id"])
 
         return jsonify({
             "success": True,
@@ -456,12 +463,12 @@ def delete_current_user():
 def update_user_by_id(user_id):
     """Update user by ID (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -506,10 +513,11 @@ def update_user_by_id(user_id):
 
         # Handle password reset by admin
         if 'new_password' in data:
-            if len(data['new_password']) < 6:
-                return jsonify({"error": "Password must be at least 6 characters"}), 400
+            password_valid, password_message = validate_password(data['new_password'])
+            if not password_valid:
+                return jsonify({"error": password_message}), 400
             
-            user.password_hash = generate_password_hash(data['new_password'])
+            user.password_hash = hash_password(data['new_password'])
             updated = True
 
         if updated:
@@ -517,6 +525,7 @@ def update_user_by_id(user_id):
                 user.updated_at = datetime.now(timezone.utc)
             
             db.session.commit()
+            invalidate_user_state(user_id)
             
             return jsonify({
                 "success": True,
@@ -536,12 +545,12 @@ def update_user_by_id(user_id):
 def delete_user(user_id):
     """Delete user by ID (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -559,6 +568,9 @@ def delete_user(user_id):
         # Delete user (this should cascade delete related posts, comments, votes if configured)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user_state(user_id)
+        invalidate_comment_lists()
+        forget_comment_liker(user_id)
 
         return jsonify({
             "success": True,
@@ -576,12 +588,12 @@ def delete_user(user_id):
 def block_user(user_id):
     """Block user (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -598,6 +610,7 @@ def block_user(user_id):
             user.updated_at = datetime.now(timezone.utc)
         
         db.session.commit()
+        invalidate_user_state(user_id)
 
         return jsonify({
             "success": True,
@@ -619,12 +632,12 @@ def block_user(user_id):
 def unblock_user(user_id):
     """Unblock user (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -633,6 +646,7 @@ def unblock_user(user_id):
             user.updated_at = datetime.now(timezone.utc)
         
         db.session.commit()
+        invalidate_user_state(user_id)
 
         return jsonify({
             "success": True,
@@ -655,7 +669,7 @@ def unblock_user(user_id):
 def upload_avatar():
     """Upload user avatar - FULLY IMPLEMENTED"""
     try:
-        user = User.query.get(get_jwt_identity())
+        user = get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -671,7 +685,7 @@ def upload_avatar():
 
         if file and allowed_file(file.filename):
             # Create upload directory if it doesn't exist
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+            ensure_dir(UPLOAD_FOLDER)
             
             # Generate secure filename
             filename = secure_filename(file.filename)
@@ -721,7 +735,7 @@ def upload_avatar():
 def search_users():
     """Search users by username or email"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user:
             return jsonify({"error": "User not found"}), 404
@@ -771,13 +785,13 @@ def get_user_stats_by_id(user_id):
     """Get individual user statistics"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
         
         # Check permissions - user can view their own stats or admin can view any
         if current_user_id != user_id and (not current_user or not current_user.is_admin):
             return jsonify({"error": "Access denied"}), 403
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -807,7 +821,7 @@ def get_user_stats_by_id(user_id):
 def get_global_user_stats():
     """Get global user statistics (admin only)"""
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = get_current_user()
         
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
@@ -1,34 +1,102 @@
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import Response, request, jsonify, current_app, g
 from flask_jwt_extended import get_jwt_identity, jwt_required, verify_jwt_in_request
-from models import User, db
+from werkzeug.security import generate_password_hash, check_password_hash
+from models import User, Post, Comment, Like, Vote, StatsCounter, db
+from sqlalchemy import func, select, case, text, insert, delete
+from sqlalchemy.orm import aliased
 from datetime import datetime, timezone
 import re
+import os
+import time
+import hashlib
+import gzip
 import logging
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+except ImportError:
+    PasswordHasher = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
 
 logger = logging.getLogger(__name__)
 
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]{3,20}$')
+
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1) if PasswordHasher else None
+
+_dummy_password_hash = None
+PASSWORD_MIN_LENGTH = 6
+PASSWORD_MAX_LENGTH = 100
+
+USER_STATE_CACHE_TTL = int(os.environ.get('USER_STATE_CACHE_TTL', 30))
+ROW_ESTIMATE_CACHE_TTL = 60
+COMMENT_LIST_INDEX_PREFIX = 'comment_list_keys:'
+COMMENT_LIST_VERSION_PREFIX = 'comment_list_ver:'
+DASHBOARD_CACHE_KEYS = ('admin:stats', 'admin:activity-trends')
+COMMENT_LIKERS_PREFIX = 'comment_likers:'
+COMMENT_LIKES_DIRTY = 'comment_likers:dirty'
+COMMENT_LIKERS_TTL = 7 * 24 * 3600
+LIKE_FLUSH_INTERVAL = int(os.environ.get('LIKE_FLUSH_INTERVAL', 5))
+LIKE_SEED_BATCH = 1000
+LIKE_SEED_TIMEOUT = 10
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 4
+
+redis_client = redis.Redis.from_url(os.environ['REDIS_URL']) if redis and os.environ.get('REDIS_URL') else None
+LIKE_WRITE_BEHIND = redis_client is not None and os.environ.get('LIKE_WRITE_BEHIND', '').lower() in ('1', 'true')
+
+if redis_client is not None:
+    _settle_dirty = redis_client.register_script(
+        "if redis.call('hincrby', KEYS[1], ARGV[1], -tonumber(ARGV[2])) <= 0 then redis.call('hdel', KEYS[1], ARGV[1]) end"
+    )
+
+_ready_dirs = set()
+
+def ensure_dir(path):
+    """os.makedirs once per process; later calls skip the syscall"""
+    if path not in _ready_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ready_dirs.add(path)
+
+def get_user_state(user_id):
+    """Cached id/is_admin/is_blocked/is_active for auth checks (shared through Redis when configured), or None if the user is gone"""
+    key = f"user_state:{user_id}:"
+    state = shared_cache(key)
+    if state is None:
+        row = db.session.query(User.id, User.is_admin, User.is_blocked, User.is_active)\
+                        .filter(User.id == user_id).first()
+        if row is None:
+            return None
+        state = shared_cache(key, dict(row._mapping), ttl=USER_STATE_CACHE_TTL)
+    return state
+
+def invalidate_user_state(user_id):
+    clear_shared_cache(f"user_state:{user_id}:")
+
 def block_check_required(fn):
    
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            
-            if request.method == "OPTIONS":
-                return fn(*args, **kwargs)
-          
             user_id = get_jwt_identity()
             if not user_id:
                 return jsonify({"error": "Authentication required"}), 401
             
             
-            user = User.query.get(user_id)
+            user = get_user_state(user_id)
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
             
-            if getattr(user, 'is_blocked', False):
+            if user['is_blocked']:
                 logger.warning(f"Blocked user {user_id} attempted to access {request.endpoint}")
                 return jsonify({
                     "error": "Access denied. Your account is blocked.",
@@ -37,7 +105,7 @@ def block_check_required(fn):
                 }), 403
             
            
-            if hasattr(user, 'is_active') and not user.is_active:
+            if not user['is_active']:
                 return jsonify({
                     "error": "Account is inactive. Please contact administrator.",
                     "inactive": True
@@ -56,24 +124,20 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            
-            if request.method == "OPTIONS":
-                return fn(*args, **kwargs)
-            
             user_id = get_jwt_identity()
             if not user_id:
                 return jsonify({"error": "Authentication required"}), 401
             
-            user = User.query.get(user_id)
+            user = get_user_state(user_id)
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
           
-            if not getattr(user, 'is_admin', False):
+            if not user['is_admin']:
                 logger.warning(f"Non-admin user {user_id} attempted to access admin endpoint {request.endpoint}")
                 return jsonify({"error": "Administrator access required"}), 403
            
-            if getattr(user, 'is_blocked', False):
+            if user['is_blocked']:
                 return jsonify({
                     "error": "Admin account is blocked. Contact system administrator.",
                     "blocked": True
@@ -96,7 +160,7 @@ def moderator_required(fn):
             if not user_id:
                 return jsonify({"error": "Authentication required"}), 401
             
-            user = User.query.get(user_id)
+            user = get_current_user()
             if not user:
                 return jsonify({"error": "User not found"}), 404
           
@@ -283,10 +347,10 @@ def validate_user_data(data, is_update=False):
     if not is_update or password:  
         if not password:
             errors.append("Password is required")
-        elif len(password) < 6:
-            errors.append("Password must be at least 6 characters")
-        elif len(password) > 100:
-            errors.append("Password must be under 100 characters")
+        else:
+            password_valid, password_message = validate_password(password)
+            if not password_valid:
+                errors.append(password_message)
     
     return errors
 
@@ -316,17 +380,60 @@ def validate_email(email):
     if not email or not isinstance(email, str):
         return False
     
-    email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-    return bool(email_pattern.match(email.strip()))
+    return bool(_EMAIL_RE.match(email.strip()))
 
 def validate_username(username):
     
     if not username or not isinstance(username, str):
         return False
     
-  
-    username_pattern = re.compile(r'^[a-zA-Z0-9_]{3,20}$')
-    return bool(username_pattern.match(username.strip()))
+    return bool(_USERNAME_RE.match(username.strip()))
+
+def hash_password(password):
+    """Hash with Argon2id, falling back to Werkzeug if argon2-cffi is missing"""
+    if _password_hasher:
+        return _password_hasher.hash(password)
+    return generate_password_hash(password)
+
+def verify_password(password_hash, password):
+    """Check a password against an Argon2 or legacy Werkzeug hash"""
+    if not password_hash:
+        return False
+    if password_hash.startswith("$argon2"):
+        if not _password_hasher:
+            return False
+        try:
+            return _password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def validate_password(password):
+    """(ok, message) for a new password against the registration length limits"""
+    if len(password) < PASSWORD_MIN_LENGTH:
+        return False, f"Password must be at least {PASSWORD_MIN_LENGTH} characters"
+    if len(password) > PASSWORD_MAX_LENGTH:
+        return False, f"Password too long (max {PASSWORD_MAX_LENGTH} characters)"
+    return True, "Valid"
+
+def password_length_plausible(password):
+    """Passwords outside the registration limits can never match, so skip hashing them"""
+    return PASSWORD_MIN_LENGTH <= len(password) <= PASSWORD_MAX_LENGTH
+
+def burn_password_check(password):
+    """Verify against a dummy hash so a missing user costs the same as a wrong password"""
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = hash_password("!invalid-dummy-password!")
+    verify_password(_dummy_password_hash, password)
+
+def password_needs_rehash(password_hash):
+   
+    if not _password_hasher:
+        return False
+    if not password_hash.startswith("$argon2"):
+        return True
+    return _password_hasher.check_needs_rehash(password_hash)
 
 def log_user_activity(activity_type, user_id=None, details=None):
     
@@ -357,14 +464,14 @@ def log_user_activity(activity_type, user_id=None, details=None):
         logger.error(f"Error logging user activity: {e}")
 
 def get_current_user():
-    
-    try:
-        user_id = get_jwt_identity()
-        if user_id:
-            return User.query.get(user_id)
-        return None
-    except:
-        return None
+    """Load the JWT user once per request and keep it on flask.g for later lookups"""
+    if 'user' not in g:
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:
+            return None
+        g.user = db.session.get(User, user_id) if user_id else None
+    return g.user
 
 def check_user_permissions(user, required_permissions=None):
     
@@ -593,6 +700,384 @@ def clear_cache(pattern=None):
     else:
         _cache.clear()
 
+def estimated_row_count(model):
+    """Planner row estimate from pg_class on PostgreSQL; exact COUNT elsewhere or before the table's first ANALYZE"""
+    key = f"row_estimate:{model.__tablename__}"
+    count = simple_cache(key)
+    if count is not None:
+        return count
+    if db.engine.dialect.name == 'postgresql':
+        count = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": model.__tablename__}
+        ).scalar()
+    if count is None or count < 0:
+        count = db.session.execute(select(func.count()).select_from(model)).scalar()
+    return simple_cache(key, count, ttl=ROW_ESTIMATE_CACHE_TTL)
+
+
+def stats_counters():
+    """Trigger-maintained row totals ({table: count}) from stats_counters on PostgreSQL; {} elsewhere"""
+    if db.engine.dialect.name != 'postgresql':
+        return {}
+    return dict(db.session.execute(select(StatsCounter.name, StatsCounter.value)).all())
+
+def comment_list_cache_key(scope, user_id=None):
+    """Cache key for a comment listing; scope is a post id or 'all'"""
+    return f"comment_list:{scope}:{user_id or 'anon'}:{request.full_path}"
+
+def conditional_json(body, etag=None):
+    """Pre-encoded JSON response with an ETag (content hash unless given); 304 when the client's If-None-Match still matches"""
+    response = Response(body, mimetype='application/json')
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def compressed_json(payload, status=200):
+    """JSON response, gzip-encoded when the client accepts it and the body is big enough to benefit"""
+    body = current_app.json.dumps(payload).encode()
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if len(body) >= GZIP_MIN_SIZE and 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def comment_list_etag(key, ttl=30):
+    """ETag from the listing's Redis version tokens, which rotate on invalidation and at least every ttl; None without Redis"""
+    if redis_client is None:
+        return None
+    versions = [COMMENT_LIST_VERSION_PREFIX + key.split(':', 2)[1], COMMENT_LIST_VERSION_PREFIX + '*']
+    token = os.urandom(8).hex()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for version in versions:
+            pipe.set(version, token, nx=True, ex=ttl)
+            pipe.get(version)
+        tokens = pipe.execute()[1::2]
+    except Exception as e:
+        logger.warning(f"Redis comment list versions unavailable: {e}")
+        return None
+    return hashlib.md5(f"{key}|{tokens}".encode()).hexdigest()
+
+def cached_comment_list(key, ttl=30):
+    """(response, etag) for a cacheable listing: 304 on a current version ETag, else the cached body, else (None, etag)"""
+    etag = comment_list_etag(key, ttl)
+    if etag is not None and etag in request.if_none_match:
+        return conditional_json(b'', etag), etag
+    body = comment_list_cache(key)
+    if body is not None:
+        return conditional_json(body, etag), etag
+    return None, etag
+
+def comment_list_cache(key, body=None, ttl=30):
+    """simple_cache for encoded comment listings, shared across workers through Redis when REDIS_URL is set"""
+    if redis_client is None:
+        return simple_cache(key, body, ttl=ttl)
+    try:
+        if body is None:
+            return redis_client.get(key)
+        index = COMMENT_LIST_INDEX_PREFIX + key.split(':', 2)[1]
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, ttl, body)
+        pipe.sadd(index, key)
+        pipe.expire(index, ttl)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis comment list cache unavailable: {e}")
+    return body
+
+def invalidate_comment_lists(post_id=None):
+    """Drop cached comment listings for one post (plus unscoped lists), or all of them"""
+    if redis_client is None:
+        if post_id is None:
+            clear_cache("comment_list:")
+        else:
+            clear_cache(f"comment_list:{post_id}:")
+            clear_cache("comment_list:all:")
+        return
+    try:
+        if post_id is None:
+            indexes = list(redis_client.scan_iter(f"{COMMENT_LIST_INDEX_PREFIX}*"))
+            versions = [f"{COMMENT_LIST_VERSION_PREFIX}*"]
+        else:
+            indexes = [f"{COMMENT_LIST_INDEX_PREFIX}{post_id}", f"{COMMENT_LIST_INDEX_PREFIX}all"]
+            versions = [f"{COMMENT_LIST_VERSION_PREFIX}{post_id}", f"{COMMENT_LIST_VERSION_PREFIX}all"]
+        pipe = redis_client.pipeline(transaction=False)
+        for index in indexes:
+            pipe.smembers(index)
+        keys = [key for members in pipe.execute() for key in members]
+        redis_client.delete(*versions, *indexes, *keys)
+    except Exception as e:
+        logger.warning(f"Redis comment list invalidation failed for post {post_id}: {e}")
+
+def encoded_cache(key, body=None, ttl=30):
+    """simple_cache for pre-encoded response bodies, shared across workers through Redis when REDIS_URL is set"""
+    if redis_client is None:
+        return simple_cache(key, body, ttl=ttl)
+    try:
+        if body is None:
+            return redis_client.get(key)
+        redis_client.setex(key, ttl, body)
+    except Exception as e:
+        logger.warning(f"Redis shared cache unavailable for {key}: {e}")
+    return body
+
+def shared_cache(key, value=None, ttl=30):
+    """simple_cache for small JSON-able values, shared across workers through Redis when REDIS_URL is set"""
+    if redis_client is None:
+        return simple_cache(key, value, ttl=ttl)
+    if value is None:
+        cached = encoded_cache(key)
+        return current_app.json.loads(cached) if cached is not None else None
+    encoded_cache(key, current_app.json.dumps(value), ttl=ttl)
+    return value
+
+def clear_shared_cache(*keys):
+    """Drop keys written by shared_cache, locally and in Redis"""
+    for key in keys:
+        _cache.pop(key, None)
+    if redis_client is None:
+        return
+    try:
+        redis_client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Redis shared cache invalidation failed for {keys}: {e}")
+
+def invalidate_dashboard():
+    """Drop cached admin dashboard aggregates after a moderation change"""
+    clear_shared_cache(*DASHBOARD_CACHE_KEYS)
+
+def seed_comment_likers(comment_id):
+    """Copy a comment's likers from the database into its Redis set; False while another request holds the seed marker"""
+    key = f"{COMMENT_LIKERS_PREFIX}{comment_id}"
+    marker = f"{key}:seeding"
+    if not redis_client.set(marker, 1, nx=True, ex=LIKE_SEED_TIMEOUT):
+        return False
+    try:
+        if not redis_client.exists(key):
+            likers = db.session.execute(select(Like.user_id).where(Like.comment_id == comment_id)).scalars().all()
+            # One MULTI/EXEC in batches: readers see all of the set or none of it, and no single
+            # SADD carries more arguments than Lua's unpack() allows. The '-' sentinel keeps a
+            # seeded set alive once its last liker leaves.
+            pipe = redis_client.pipeline()
+            pipe.sadd(key, '-')
+            for start in range(0, len(likers), LIKE_SEED_BATCH):
+                pipe.sadd(key, *likers[start:start + LIKE_SEED_BATCH])
+            pipe.expire(key, COMMENT_LIKERS_TTL)
+            pipe.execute()
+    finally:
+        redis_client.delete(marker)
+    return True
+
+def buffer_comment_like(comment_id, user_id, liked):
+    """Record a like/unlike in Redis for flush_comment_likes and return the comment's like count"""
+    key = f"{COMMENT_LIKERS_PREFIX}{comment_id}"
+    deadline = time.monotonic() + LIKE_SEED_TIMEOUT
+    while not redis_client.exists(key) and not seed_comment_likers(comment_id):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Timed out waiting for likers of comment {comment_id} to be seeded")
+        time.sleep(0.05)
+    pipe = redis_client.pipeline()
+    if liked:
+        pipe.sadd(key, user_id)
+    else:
+        pipe.srem(key, user_id)
+    pipe.expire(key, COMMENT_LIKERS_TTL)
+    pipe.hincrby(COMMENT_LIKES_DIRTY, comment_id, 1)
+    pipe.scard(key)
+    likes_count = pipe.execute()[-1] - 1
+
+    try:
+        flush_comment_likes()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error flushing buffered comment likes: {e}")
+    return likes_count
+
+def flush_comment_likes():
+    """Reconcile buffered comment likes from Redis into the likes table; returns how many comments were
+    written, or None when another flush holds the lock or ran within the last LIKE_FLUSH_INTERVAL seconds"""
+    if not redis_client.set(f"{COMMENT_LIKES_DIRTY}:lock", 1, nx=True, ex=LIKE_FLUSH_INTERVAL):
+        return None
+    dirty = {int(cid): int(n) for cid, n in redis_client.hgetall(COMMENT_LIKES_DIRTY).items()}
+    if not dirty:
+        return 0
+    post_ids = dict(db.session.execute(select(Comment.id, Comment.post_id).where(Comment.id.in_(dirty))).all())
+
+    pipe = redis_client.pipeline(transaction=False)
+    for comment_id in post_ids:
+        pipe.smembers(f"{COMMENT_LIKERS_PREFIX}{comment_id}")
+    buffered = dict(zip(post_ids, pipe.execute()))
+    # A seeded set always holds '-', so an empty one expired or was evicted: its buffered changes
+    # are gone, and reconciling against it would delete every stored like
+    missing = [cid for cid, members in buffered.items() if not members]
+    for comment_id in missing:
+        del buffered[comment_id]
+    if missing:
+        logger.warning(f"Buffered likers missing for comments {missing}; re-seeding them from the database")
+
+    stored = {}
+    for comment_id, user_id in db.session.execute(
+        select(Like.comment_id, Like.user_id).where(Like.comment_id.in_(post_ids))
+    ):
+        stored.setdefault(comment_id, set()).add(user_id)
+
+    buffered = {cid: {int(m) for m in members if m != b'-'} for cid, members in buffered.items()}
+    # A deleted user's id can linger in a set; inserting it would fail the users FK
+    live_users = set(db.session.execute(
+        select(User.id).where(User.id.in_(set().union(*buffered.values())))
+    ).scalars()) if buffered else set()
+
+    now = datetime.now(timezone.utc)
+    failed = set()
+    for comment_id, likers in buffered.items():
+        likers &= live_users
+        current = stored.get(comment_id, set())
+        added = [{'comment_id': comment_id, 'user_id': u, 'created_at': now} for u in likers - current]
+        removed = current - likers
+        # One SAVEPOINT per comment, so a bad row leaves this comment dirty without blocking the rest
+        try:
+            with db.session.begin_nested():
+                if removed:
+                    db.session.execute(delete(Like).where(Like.comment_id == comment_id, Like.user_id.in_(removed)))
+                if added:
+                    db.session.execute(insert(Like), added)
+        except Exception as e:
+            failed.add(comment_id)
+            logger.error(f"Error flushing buffered likes for comment {comment_id}: {e}")
+    db.session.commit()
+
+    gone = [f"{COMMENT_LIKERS_PREFIX}{cid}" for cid in dirty if cid not in post_ids]
+    if gone:
+        redis_client.delete(*gone)
+    for comment_id in missing:
+        seed_comment_likers(comment_id)
+    for comment_id, n in dirty.items():
+        if comment_id not in failed:
+            _settle_dirty(keys=[COMMENT_LIKES_DIRTY], args=[comment_id, n])
+    for post_id in {post_ids[cid] for cid in buffered if cid not in failed}:
+        invalidate_comment_lists(post_id)
+    return len(buffered) - len(failed)
+
+def forget_comment_liker(user_id):
+    """Drop a deleted user from every buffered likers set so flushes and counts stop seeing them"""
+    if not LIKE_WRITE_BEHIND:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in redis_client.scan_iter(match=f"{COMMENT_LIKERS_PREFIX}*", count=1000):
+            # Skip the dirty hash, its lock and seed markers; only comment_likers:<id> are sets
+            if key.rsplit(b':', 1)[-1].isdigit():
+                pipe.srem(key, user_id)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis likers cleanup failed for user {user_id}: {e}")
+
+
+def posts_with_counts(query, current_user_id=None):
+    """Outer-join GROUP BY like/vote/comment aggregates (and the caller's own vote and like) onto a Post query"""
+    likes = select(Like.post_id, func.count().label('n'))\
+            .where(Like.post_id.isnot(None))\
+            .group_by(Like.post_id).subquery()
+    votes = select(
+        Vote.post_id,
+        func.sum(Vote.value).label('score'),
+        func.count(case((Vote.value == 1, 1))).label('up'),
+        func.count(case((Vote.value == -1, 1))).label('down'),
+        func.count().label('total')
+    ).where(Vote.post_id.isnot(None)).group_by(Vote.post_id).subquery()
+    comments = select(
+        Comment.post_id,
+        func.count().label('total'),
+        func.count(case((Comment.is_approved == True, 1))).label('approved')
+    ).group_by(Comment.post_id).subquery()
+
+    query = query.outerjoin(likes, likes.c.post_id == Post.id)\
+                 .outerjoin(votes, votes.c.post_id == Post.id)\
+                 .outerjoin(comments, comments.c.post_id == Post.id)\
+                 .add_columns(
+                     func.coalesce(likes.c.n, 0).label('likes_count'),
+                     func.coalesce(votes.c.score, 0).label('vote_score'),
+                     func.coalesce(votes.c.up, 0).label('upvotes_count'),
+                     func.coalesce(votes.c.down, 0).label('downvotes_count'),
+                     func.coalesce(votes.c.total, 0).label('total_votes'),
+                     func.coalesce(comments.c.approved, 0).label('comments_count'),
+                     func.coalesce(comments.c.total, 0).label('all_comments_count')
+                 )
+    if current_user_id:
+        my_vote = aliased(Vote)
+        my_like = aliased(Like)
+        query = query.outerjoin(my_vote, db.and_(my_vote.post_id == Post.id, my_vote.user_id == current_user_id))\
+                     .outerjoin(my_like, db.and_(my_like.post_id == Post.id, my_like.user_id == current_user_id))\
+                     .add_columns(
+                         my_vote.value.label('user_vote'),
+                         (my_like.id.isnot(None)).label('user_liked')
+                     )
+    return query
+
+def comments_with_counts(query, current_user_id=None):
+    """Add the trigger-maintained like/vote/reply counters (and the caller's own vote and like) to a Comment query"""
+    query = query.add_columns(
+        Comment.likes_count.label('likes_count'),
+        Comment.vote_score.label('vote_score'),
+        Comment.upvotes.label('upvotes_count'),
+        Comment.downvotes.label('downvotes_count'),
+        (Comment.upvotes + Comment.downvotes).label('total_votes'),
+        Comment.replies_count.label('replies_count')
+    )
+    if current_user_id:
+        my_vote = aliased(Vote)
+        my_like = aliased(Like)
+        query = query.outerjoin(my_vote, db.and_(my_vote.comment_id == Comment.id, my_vote.user_id == current_user_id))\
+                     .outerjoin(my_like, db.and_(my_like.comment_id == Comment.id, my_like.user_id == current_user_id))\
+                     .add_columns(
+                         my_vote.value.label('user_vote'),
+                         (my_like.id.isnot(None)).label('user_liked')
+                     )
+    return query
+
+
+KEYSET_DEFAULT_LIMIT = 25
+KEYSET_MAX_LIMIT = 100
+
+def encode_cursor(item):
+    """Opaque keyset cursor for a row ordered by (created_at, id)"""
+    return f"{item.created_at.isoformat()}|{item.id}"
+
+def decode_cursor(value):
+    """Parse a cursor from encode_cursor; raises ValueError on malformed input"""
+    created_at, _, item_id = value.rpartition('|')
+    # an unescaped '+' in the UTC offset arrives from the query string as a space
+    return datetime.fromisoformat(created_at.replace(' ', '+')), int(item_id)
+
+def apply_cursor(query, model, cursor, ascending=False):
+    """Seek past the cursor row instead of OFFSET-scanning the skipped rows"""
+    created_at, item_id = cursor
+    if ascending:
+        return query.filter(
+            db.or_(
+                model.created_at > created_at,
+                db.and_(model.created_at == created_at, model.id > item_id)
+            )
+        )
+    return query.filter(
+        db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < item_id)
+        )
+    )
+
+def page_with_probe(query, page, per_page):
+    """One page of rows plus has_next, read from a single extra probe row instead of a COUNT(*) over the filter"""
+    page = max(page, 1)
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    return rows[:per_page], len(rows) > per_page
+
 
 def contains_inappropriate_content(text):
     
@@ -643,7 +1128,7 @@ def get_content_stats(user_id=None):
     try:
         if user_id:
         
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 return None
             
@@ -685,8 +1170,8 @@ def serialize_comment(comment):
         "updated_at": comment.updated_at.isoformat() if comment.updated_at else None,
         "is_approved": comment.is_approved,
         "is_flagged": comment.is_flagged,
-        "likes_count": len(comment.likes) if hasattr(comment, 'likes') else 0,
-        "vote_score": sum(v.value for v in comment.votes) if hasattr(comment, 'votes') else 0
+        "likes_count": comment.likes_count,
+        "vote_score": comment.vote_score
     }
    
 def serialize_post(post, current_user_id=None):
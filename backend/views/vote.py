@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from models import db, User, Post, Comment, Vote
-from datetime import datetime
+from sqlalchemy.orm import contains_eager
+from datetime import datetime, timezone
+from functools import wraps
 import logging
 
 
@@ -10,16 +12,16 @@ try:
 except ImportError:
     def block_check_required(f):
     
+        @wraps(f)
         def wrapper(*args, **kwargs):
             try:
                 current_user_id = get_jwt_identity()
-                current_user = User.query.get(current_user_id)
+                current_user = db.session.get(User, current_user_id)
                 if current_user and current_user.is_blocked:
                     return jsonify({"error": "User is blocked"}), 403
                 return f(*args, **kwargs)
             except Exception as e:
                 return f(*args, **kwargs)
-        wrapper.__name__ = f.__name__
         return wrapper
 
 logger = logging.getLogger(__name__)
@@ -49,12 +51,12 @@ def vote_post():
             return jsonify({"error": "value must be 1 (upvote) or -1 (downvote)"}), 400
 
     
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": "Post not found"}), 404
 
     
-        current_user = User.query.get(user_id)
+        current_user = db.session.get(User, user_id)
         if not post.is_approved and not (current_user and current_user.is_admin) and post.user_id != user_id:
             return jsonify({"error": "Cannot vote on unapproved post"}), 403
 
@@ -70,7 +72,7 @@ def vote_post():
             else:
                
                 existing_vote.value = value 
-                existing_vote.created_at = datetime.utcnow()
+                existing_vote.created_at = datetime.now(timezone.utc)
                 msg = "Vote updated"
                 user_vote = value
         else:
@@ -79,7 +81,7 @@ def vote_post():
                 user_id=user_id, 
                 post_id=post_id, 
                 value=value,
-                created_at=datetime.utcnow()
+                created_at=datetime.now(timezone.utc)
             )
             db.session.add(vote)
             msg = "Vote recorded"
@@ -126,7 +128,7 @@ def get_post_score(post_id):
         except Exception:
             pass
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": "Post not found"}), 404
 
@@ -178,12 +180,12 @@ def vote_comment():
         if value not in [-1, 1]:
             return jsonify({"error": "value must be 1 (upvote) or -1 (downvote)"}), 400
 
-        comment = Comment.query.get(comment_id)
+        comment = db.session.get(Comment, comment_id)
         if not comment:
             return jsonify({"error": f"Comment with ID {comment_id} does not exist"}), 404
 
         
-        current_user = User.query.get(user_id)
+        current_user = db.session.get(User, user_id)
         if not comment.is_approved and not (current_user and current_user.is_admin) and comment.user_id != user_id:
             return jsonify({"error": "Cannot vote on unapproved comment"}), 403
        
@@ -198,7 +200,7 @@ def vote_comment():
             else:
                 
                 existing_vote.value = value
-                existing_vote.created_at = datetime.utcnow()
+                existing_vote.created_at = datetime.now(timezone.utc)
                 msg = "Vote updated"
                 user_vote = value
         else:
@@ -207,7 +209,7 @@ def vote_comment():
                 user_id=user_id, 
                 comment_id=comment_id, 
                 value=value,
-                created_at=datetime.utcnow()
+                created_at=datetime.now(timezone.utc)
             )
             db.session.add(new_vote)
             msg = "Vote recorded"
@@ -216,11 +218,8 @@ def vote_comment():
         db.session.commit()
 
         
-        votes = Vote.query.filter_by(comment_id=comment_id).all()
-        score = sum(v.value for v in votes)
-        upvotes = len([v for v in votes if v.value == 1])
-        downvotes = len([v for v in votes if v.value == -1])
-        total_votes = len(votes)
+        score, upvotes, downvotes = comment.vote_score, comment.upvotes, comment.downvotes
+        total_votes = upvotes + downvotes
 
         logger.info(f"User {user_id} voted {value} on comment {comment_id}")
 
@@ -254,15 +253,12 @@ def get_comment_score(comment_id):
         except Exception:
             pass
 
-        comment = Comment.query.get(comment_id)
+        comment = db.session.get(Comment, comment_id)
         if not comment:
             return jsonify({"error": "Comment not found"}), 404
 
-        votes = Vote.query.filter_by(comment_id=comment_id).all()
-        score = sum(v.value for v in votes)
-        upvotes = len([v for v in votes if v.value == 1])
-        downvotes = len([v for v in votes if v.value == -1])
-        total_votes = len(votes)
+        score, upvotes, downvotes = comment.vote_score, comment.upvotes, comment.downvotes
+        total_votes = upvotes + downvotes
 
        
         if current_user_id:
@@ -292,7 +288,7 @@ def get_user_votes(user_id):
    
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = db.session.get(User, current_user_id)
         
        
         if current_user_id != user_id and (not current_user or not current_user.is_admin):
@@ -329,7 +325,7 @@ def delete_vote_on_post(post_id):
     try:
         user_id = get_jwt_identity()
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": f"Post ID {post_id} does not exist"}), 404
 
@@ -371,7 +367,7 @@ def delete_comment_vote(comment_id):
     try:
         user_id = get_jwt_identity()
 
-        comment = Comment.query.get(comment_id)
+        comment = db.session.get(Comment, comment_id)
         if not comment:
             return jsonify({"error": "Comment not found"}), 404
 
@@ -383,10 +379,7 @@ def delete_comment_vote(comment_id):
         db.session.commit()
 
       
-        votes = Vote.query.filter_by(comment_id=comment_id).all()
-        score = sum(v.value for v in votes)
-        upvotes = len([v for v in votes if v.value == 1])
-        downvotes = len([v for v in votes if v.value == -1])
+        score, upvotes, downvotes = comment.vote_score, comment.upvotes, comment.downvotes
 
         logger.info(f"User {user_id} deleted vote on comment {comment_id}")
 
@@ -411,15 +404,15 @@ def delete_comment_vote(comment_id):
 def admin_get_post_votes(post_id):
    
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = db.session.get(User, get_jwt_identity())
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": "Post not found"}), 404
 
-        votes = Vote.query.filter_by(post_id=post_id).join(User).all()
+        votes = Vote.query.filter_by(post_id=post_id).join(Vote.user).options(contains_eager(Vote.user)).all()
         
         vote_details = []
         for vote in votes:
@@ -451,11 +444,11 @@ def admin_get_post_votes(post_id):
 def admin_delete_vote(vote_id):
    
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = db.session.get(User, get_jwt_identity())
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        vote = Vote.query.get(vote_id)
+        vote = db.session.get(Vote, vote_id)
         if not vote:
             return jsonify({"error": "Vote not found"}), 404
 
@@ -489,11 +482,11 @@ def admin_delete_vote(vote_id):
 def admin_reset_post_votes(post_id):
     
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = db.session.get(User, get_jwt_identity())
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        post = Post.query.get(post_id)
+        post = db.session.get(Post, post_id)
         if not post:
             return jsonify({"error": "Post not found"}), 404
 
@@ -525,15 +518,15 @@ def admin_reset_post_votes(post_id):
 def admin_get_comment_votes(comment_id):
    
     try:
-        current_user = User.query.get(get_jwt_identity())
+        current_user = db.session.get(User, get_jwt_identity())
         if not current_user or not current_user.is_admin:
             return jsonify({"error": "Admin privileges required"}), 403
 
-        comment = Comment.query.get(comment_id)
+        comment = db.session.get(Comment, comment_id)
         if not comment:
             return jsonify({"error": "Comment not found"}), 404
 
-        votes = Vote.query.filter_by(comment_id=comment_id).join(User).all()
+        votes = Vote.query.filter_by(comment_id=comment_id).join(Vote.user).options(contains_eager(Vote.user)).all()
         
         vote_details = []
         for vote in votes:
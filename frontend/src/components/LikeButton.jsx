@@ -73,7 +73,7 @@ const LikeButton = ({
         : `${VITE_API_URL}/api/comments/${id}/like`;
 
       const res = await fetch(endpoint, {
-        method: "POST",
+        method: type === 'comment' && wasLiked ? "DELETE" : "POST",
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,